@@ -11,20 +11,23 @@ from engine.voice_registry import (
     get_voice_id,
     add_voice
 )
-from pipeline.process_clip import process_single_clip
+from pipeline.process_clip import process_single_clip, preview_config
 from pipeline.combine_clips import combine_clips
 
 UPLOAD_DIR = "uploads"
 CLIPS_DIR = "clips_output"
+PREVIEW_DIR = "clips_preview"
 LOGO_PATH = "bluvo-logo.png"
 FINAL_VIDEO = "final.mp4"
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CLIPS_DIR, exist_ok=True)
+os.makedirs(PREVIEW_DIR, exist_ok=True)
 
 CONFIG = {
     "BLUR_PLATE": True,
-    "PLATE_MODEL_PATH": "models/lp_key_point.pt"
+    "PLATE_MODEL_PATH": "models/lp_key_point.pt",
+    "BASE_CACHE": True,
 }
 
 st.set_page_config(layout="wide")
@@ -74,22 +77,27 @@ for i, label in enumerate(CLIPS, 1):
     highlights = st.text_area("Highlights (1 per line)", key=f"h{i}")
 
     if video and tts and highlights:
-        if st.button(f"Generate {label}", key=f"g{i}"):
+        col_preview, col_final = st.columns(2)
+        preview = col_preview.button(f"Preview {label}", key=f"p{i}")
+        finalize = col_final.button(f"Finalize {label}", key=f"g{i}")
+
+        if preview or finalize:
             raw = f"{UPLOAD_DIR}/{i}.mp4"
-            out = f"{CLIPS_DIR}/{i}.mp4"
+            out = f"{PREVIEW_DIR if preview else CLIPS_DIR}/{i}.mp4"
             with open(raw, "wb") as f:
-                f.write(video.read())
+                f.write(video.getvalue())
 
             process_single_clip(
                 raw,
                 tts,
                 highlights.splitlines(),
                 out,
-                CONFIG,
+                preview_config(CONFIG) if preview else CONFIG,
                 voice_id
             )
 
-            done[i] = out
+            if finalize:
+                done[i] = out
             st.video(out)
 
 # ================= FINAL =================
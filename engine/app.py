@@ -5,7 +5,7 @@ load_dotenv()
 import os
 import streamlit as st
 
-from pipeline.process_clip import process_single_clip
+from pipeline.process_clip import process_single_clip, preview_config
 from pipeline.combine_clips import combine_clips
 
 # ======================================================
@@ -14,11 +14,13 @@ from pipeline.combine_clips import combine_clips
 
 UPLOAD_DIR = "uploads"
 CLIPS_DIR = "clips_output"
+PREVIEW_DIR = "clips_preview"
 FINAL_OUTPUT = "combined_output.mp4"
 LOGO_PATH = "bluvo-logo.png"
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CLIPS_DIR, exist_ok=True)
+os.makedirs(PREVIEW_DIR, exist_ok=True)
 
 # ======================================================
 # CONFIG (shared with backend)
@@ -42,6 +44,9 @@ CONFIG = {
 
     "BLUR_PLATE": True,
     "PLATE_MODEL_PATH": "models/lp_key_point.pt",
+
+    # Reuse blur + TTS + Whisper when only highlights / style change
+    "BASE_CACHE": True,
 }
 
 CLIP_LABELS = [
@@ -61,6 +66,8 @@ st.title("🚗 AI Car Video Generator")
 
 if "done" not in st.session_state:
     st.session_state.done = {}
+if "preview" not in st.session_state:
+    st.session_state.preview = {}
 
 for idx, label in enumerate(CLIP_LABELS, start=1):
     st.divider()
@@ -85,13 +92,19 @@ for idx, label in enumerate(CLIP_LABELS, start=1):
     )
 
     if video and tts and highlights:
-        if st.button(f"Generate {label}", key=f"gen_{idx}"):
+        col_preview, col_final = st.columns(2)
+        preview = col_preview.button(f"Preview {label}", key=f"prev_{idx}")
+        finalize = col_final.button(f"Finalize {label}", key=f"gen_{idx}")
+
+        if preview or finalize:
             with st.status(f"Processing {label}...", expanded=True):
                 raw_path = os.path.join(UPLOAD_DIR, f"{idx}.mp4")
-                out_path = os.path.join(CLIPS_DIR, f"{idx}.mp4")
+                out_path = os.path.join(
+                    PREVIEW_DIR if preview else CLIPS_DIR, f"{idx}.mp4"
+                )
 
                 with open(raw_path, "wb") as f:
-                    f.write(video.read())
+                    f.write(video.getvalue())
 
                 hl_list = [h.strip() for h in highlights.splitlines() if h.strip()]
 
@@ -100,11 +113,19 @@ for idx, label in enumerate(CLIP_LABELS, start=1):
                     tts_script=tts,
                     highlights=hl_list,
                     output_path=out_path,
-                    config=CONFIG
+                    config=preview_config(CONFIG) if preview else CONFIG
                 )
 
-                st.session_state.done[idx] = out_path
-                st.success(f"{label} generated successfully")
+                if preview:
+                    st.session_state.preview[idx] = out_path
+                    st.success(f"{label} preview ready")
+                else:
+                    st.session_state.done[idx] = out_path
+                    st.success(f"{label} generated successfully")
+
+    if idx in st.session_state.preview and idx not in st.session_state.done:
+        st.video(st.session_state.preview[idx])
+        st.caption("👀 Preview (540p) – finalize when the highlights look right")
 
     if idx in st.session_state.done:
         st.video(st.session_state.done[idx])
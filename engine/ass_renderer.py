@@ -0,0 +1,174 @@
+# engine/ass_renderer.py
+#
+# Highlights → ASS subtitle script, burned in by ffmpeg's `ass` filter
+# (libass) during the single final encode. Same fonts, colors, glow,
+# fades, zones and case/line rules as TextRenderer + VideoBuilder.
+
+from pathlib import Path
+
+from PIL import ImageFont
+
+from engine.text_renderer import TextRenderer
+
+MARGIN = 60  # VideoBuilder.resolve_position margin
+
+# zone → (\an alignment, horizontal, vertical)
+ZONE_ALIGN = {
+    "top-left": (7, "left", "top"),
+    "top-center": (8, "center", "top"),
+    "top-right": (9, "right", "top"),
+    "center-left": (4, "left", "center"),
+    "center": (5, "center", "center"),
+    "center-right": (6, "right", "center"),
+    "bottom-left": (1, "left", "bottom"),
+    "bottom-center": (2, "center", "bottom"),
+    "bottom-right": (3, "right", "bottom"),
+}
+
+
+def ass_color(rgba) -> str:
+    """
+    (r, g, b, a) → &HAABBGGRR (ASS alpha is inverted: 00 = opaque).
+    """
+    r, g, b = rgba[:3]
+    a = rgba[3] if len(rgba) > 3 else 255
+    return f"&H{255 - a:02X}{b:02X}{g:02X}{r:02X}"
+
+
+def ass_time(t: float) -> str:
+    cs = int(round(max(t, 0.0) * 100))
+    h, cs = divmod(cs, 360000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def _fill(rgba) -> str:
+    """
+    Inline fill override: \\1c&HBBGGRR& + \\1a&HAA&.
+    """
+    c = ass_color(rgba)
+    return f"\\1c&H{c[4:]}&\\1a&H{c[2:4]}&"
+
+
+def font_family(font_path: str) -> str:
+    """
+    Family name libass matches against the files in fontsdir.
+    """
+    return ImageFont.truetype(font_path, 10).getname()[0]
+
+
+def _escape(text: str) -> str:
+    # braces open override blocks, backslashes start tags
+    return text.replace("\\", "/").replace("{", "(").replace("}", ")")
+
+
+class AssRenderer:
+    def __init__(self, style, video_w, video_h, rng=None):
+        self.cfg = style
+        self.w = video_w
+        self.h = video_h
+
+        self.text = TextRenderer(style, rng=rng)
+        self.size = self.text.font_size(video_w)
+        self.number_size = int(self.size * 1.05)
+
+        self.desc_font = font_family(style["FONT_DESC"])
+        self.number_font = font_family(style["FONT_NUMBER"])
+
+        self.events = []
+
+    # ======================================================
+    # LAYOUT
+    # ======================================================
+    def _anchor(self, zone):
+        """
+        \\an + \\pos for a zone. The PIL block is inset by PADDING
+        inside the VideoBuilder margin, so the text anchor is too.
+        """
+        an, hor, ver = ZONE_ALIGN[zone]
+        inset = int(MARGIN * self.cfg.get("RENDER_SCALE", 1.0)) + self.cfg["PADDING"]
+
+        x = {"left": inset, "center": self.w // 2, "right": self.w - inset}[hor]
+        y = {"top": inset, "center": self.h // 2, "bottom": self.h - inset}[ver]
+
+        return an, x, y
+
+    def _body(self, lines, glow):
+        """
+        One event, one `\\N` per line; number lines switch font/color.
+        """
+        parts = []
+
+        for line in lines:
+            is_number = any(c.isdigit() for c in line)
+
+            if glow:
+                color = self.cfg["GLOW_COLOR"]
+            else:
+                color = self.cfg["NUMBER_COLOR"] if is_number else self.cfg["DESC_COLOR"]
+
+            font = self.number_font if is_number else self.desc_font
+            size = self.number_size if is_number else self.size
+
+            parts.append(
+                f"{{\\fn{font}\\fs{size}{_fill(color)}}}{_escape(line)}"
+            )
+
+        return "\\N".join(parts)
+
+    # ======================================================
+    # EVENTS
+    # ======================================================
+    def add_highlight(self, text, start, end, position):
+        lines = self.text.style_lines(text)
+        if not lines:
+            return
+
+        an, x, y = self._anchor(position)
+        fade = int(self.cfg["FADE"] * 1000)
+        head = f"\\an{an}\\pos({x},{y})\\fad({fade},{fade})"
+
+        # layer 0: blurred glow under the text, like the PIL GaussianBlur pass
+        glow = f"{{{head}\\bord0\\shad0\\blur{self.cfg['GLOW_BLUR']}}}"
+        main = f"{{{head}\\bord0\\shad0}}"
+
+        for layer, override, body in (
+            (0, glow, self._body(lines, glow=True)),
+            (1, main, self._body(lines, glow=False)),
+        ):
+            self.events.append(
+                f"Dialogue: {layer},{ass_time(start)},{ass_time(end)},"
+                f"Default,,0,0,0,,{override}{body}"
+            )
+
+    # ======================================================
+    # SCRIPT
+    # ======================================================
+    def script(self) -> str:
+        header = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {self.w}",
+            f"PlayResY: {self.h}",
+            "WrapStyle: 2",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+            "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
+            "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            f"Style: Default,{self.desc_font},{self.size},"
+            f"{ass_color(self.cfg['DESC_COLOR'])},&H000000FF,&H00000000,&H00000000,"
+            "0,0,0,0,100,100,0,0,1,0,0,5,0,0,0,1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, "
+            "Effect, Text",
+        ]
+        return "\n".join(header + self.events) + "\n"
+
+    def write(self, path) -> str:
+        Path(path).write_text(self.script(), encoding="utf-8")
+        return str(path)
@@ -0,0 +1,234 @@
+# engine/base_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+# Config keys that change the base artifact (blur + voice), NOT overlays
+# Config keys that change the voice (TTS audio + word timestamps)
+VOICE_KEYS = (
+    "TTS_BACKEND", "TTS_FALLBACK", "TTS_STREAM_ALIGN",
+    "WHISPER_DEVICE", "WHISPER_COMPUTE_TYPE", "WHISPER_THREADS",
+    "WHISPER_BATCH_SIZE",
+)
+
+BASE_KEYS = (
+    "BLUR_PLATE", "PLATE_MODEL_PATH", "PLATE_CONF", "PLATE_SMOOTH",
+    "PLATE_IMGSZ", "PLATE_ADAPTIVE_IMGSZ", "PLATE_REFINE", "PLATE_BACKEND",
+    "PLATE_ONNX_CALIBRATION", "PLATE_IO", "PLATE_IO_CODEC",
+    "INGEST_SIZE", "INGEST_FPS",
+    "PREVIEW", "PREVIEW_HEIGHT", "PREVIEW_FPS",
+) + VOICE_KEYS
+
+
+# Source identity: size + head/tail samples, not a full read. No
+# mtime: the UIs rewrite the same upload on every click.
+SAMPLE_BYTES = 1 << 20
+
+# Entries used this recently are never evicted (a job may still read them)
+BUSY_SECONDS = 3600
+
+
+def file_fingerprint(path, sample=SAMPLE_BYTES):
+    """
+    Cheap identity for a (possibly multi-GB) source: its size and the
+    hashes of its first and last `sample` bytes.
+    """
+    st = os.stat(path)
+    h = hashlib.sha256(str(st.st_size).encode())
+
+    with open(path, "rb") as f:
+        h.update(f.read(sample))
+        if st.st_size > sample:
+            f.seek(max(st.st_size - sample, sample))
+            h.update(f.read(sample))
+
+    return h.hexdigest()
+
+
+class BaseClipCache:
+    """
+    Per-clip "base" artifact: blurred, looped source muxed with the
+    voice track, plus its word timestamps. Keyed by the hashes of
+    everything that produced it, so highlight / style edits reuse it
+    and only re-run overlay compositing + the final encode.
+    """
+
+    def __init__(self, cache_dir="cache/base", max_gb=None, max_days=None):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_gb * (1 << 30) if max_gb else None
+        self.max_age = max_days * 86400 if max_days else None
+
+    def voice_key(self, tts_script, voice_id, config) -> str:
+        h = hashlib.sha256()
+        h.update(tts_script.strip().encode("utf-8"))
+        h.update(str(voice_id).encode())
+        h.update(
+            json.dumps(
+                {k: config.get(k) for k in VOICE_KEYS},
+                sort_keys=True,
+                default=str
+            ).encode()
+        )
+        return "voice_" + h.hexdigest()[:32]
+
+    def key(self, video_path, tts_script, voice_id, config) -> str:
+        h = hashlib.sha256()
+        h.update(file_fingerprint(video_path).encode())
+        h.update(tts_script.strip().encode("utf-8"))
+        h.update(str(voice_id).encode())
+        h.update(
+            json.dumps(
+                {k: config.get(k) for k in BASE_KEYS},
+                sort_keys=True,
+                default=str
+            ).encode()
+        )
+        return h.hexdigest()[:32]
+
+    def _paths(self, key):
+        return self.dir / f"{key}.mp4", self.dir / f"{key}.json"
+
+    def _touch(self, *paths):
+        # mtime is the LRU clock (atime is often disabled)
+        for p in paths:
+            try:
+                os.utime(p)
+            except OSError:
+                pass
+
+    def get(self, key):
+        """
+        {"video", "transcript"} or None.
+        """
+        video, meta = self._paths(key)
+        if not (video.exists() and meta.exists()):
+            return None
+
+        self._touch(video, meta)
+        return {
+            "video": str(video),
+            "transcript": json.loads(meta.read_text()),
+        }
+
+    # --------------------------------------------------
+    # Voice entries: the same TTS take (and so the same highlight
+    # timings) is reused by preview and final renders
+    # --------------------------------------------------
+    def get_voice(self, key):
+        """
+        {"audio", "transcript"} or None.
+        """
+        meta = self.dir / f"{key}.json"
+        audio = next(
+            (p for p in self.dir.glob(f"{key}.*") if p.suffix not in (".json", ".tmp")),
+            None
+        )
+        if not (audio and meta.exists()):
+            return None
+
+        self._touch(audio, meta)
+        return {
+            "audio": str(audio),
+            "transcript": json.loads(meta.read_text()),
+        }
+
+    def put_voice(self, key, audio_path, transcript):
+        audio = self.dir / f"{key}{Path(audio_path).suffix or '.mp3'}"
+        meta = self.dir / f"{key}.json"
+
+        tag = uuid.uuid4().hex[:8]
+        tmp_audio = self.dir / f"{key}.{tag}.tmp"
+        tmp_meta = self.dir / f"{key}.{tag}.json.tmp"
+
+        try:
+            shutil.copyfile(audio_path, tmp_audio)
+            tmp_meta.write_text(json.dumps(transcript))
+            os.replace(tmp_audio, audio)
+            os.replace(tmp_meta, meta)
+        finally:
+            for f in (tmp_audio, tmp_meta):
+                if f.exists():
+                    f.unlink()
+
+        self.evict()
+        return self.get_voice(key)
+
+    def put(self, key, base_path, transcript):
+        """
+        Store a finished base (looped video + voice, already muxed by
+        the caller with stream copy) with its transcript. `base_path`
+        is moved into the cache; files appear atomically.
+        """
+        video, meta = self._paths(key)
+        # unique temp names: concurrent jobs may build the same key
+        tag = uuid.uuid4().hex[:8]
+        tmp_video = video.with_suffix(f".{tag}.tmp.mp4")
+        tmp_meta = meta.with_suffix(f".{tag}.tmp")
+
+        try:
+            shutil.move(base_path, tmp_video)
+            tmp_meta.write_text(json.dumps(transcript))
+
+            os.replace(tmp_video, video)
+            os.replace(tmp_meta, meta)
+
+        finally:
+            for f in (tmp_video, tmp_meta):
+                if f.exists():
+                    f.unlink()
+
+        self.evict()
+        return self.get(key)
+
+    # --------------------------------------------------
+    # Eviction: entries older than max_days go first, then least
+    # recently used ones until the cache fits in max_gb
+    # --------------------------------------------------
+    def _entries(self):
+        """
+        key → [last use, bytes, paths] for every finished entry.
+        """
+        entries = {}
+        for p in self.dir.iterdir():
+            if ".tmp" in p.suffixes or not p.is_file():
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+
+            e = entries.setdefault(p.name.split(".")[0], [0.0, 0, []])
+            e[0] = max(e[0], st.st_mtime)
+            e[1] += st.st_size
+            e[2].append(p)
+
+        return entries
+
+    def evict(self):
+        if not (self.max_bytes or self.max_age):
+            return
+
+        now = time.time()
+        entries = sorted(self._entries().values(), key=lambda e: e[0])
+        total = sum(e[1] for e in entries)
+
+        for used, size, paths in entries:
+            if now - used < BUSY_SECONDS:
+                break
+
+            expired = self.max_age and now - used > self.max_age
+            if not expired and not (self.max_bytes and total > self.max_bytes):
+                break
+
+            for p in paths:
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
@@ -0,0 +1,146 @@
+# engine/batch_transcriber.py
+
+import numpy as np
+
+from engine.production_highlight_matcher import collect_words
+from engine.whisper_runtime import load_whisper
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30.0     # Whisper window
+CLIP_GAP_SECONDS = 1.0   # silence between clips in the joined timeline
+
+
+def _speech_chunks(audio, offset):
+    """
+    VAD speech regions of one clip as BatchedInferencePipeline
+    clip_timestamps: seconds on the joined timeline (`offset` = this
+    clip's first sample; the pipeline multiplies by the sample rate).
+    Regions longer than one Whisper window are split into windows,
+    then neighbours are merged greedily up to one window — never
+    across clips.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    window = int(CHUNK_SECONDS * SAMPLE_RATE)
+
+    speech = get_speech_timestamps(audio, VadOptions())
+    if not speech:
+        speech = [{"start": 0, "end": len(audio)}]
+
+    pieces = []
+    for s in speech:
+        for start in range(s["start"], s["end"], window):
+            pieces.append([start, min(s["end"], start + window)])
+
+    chunks = []
+    for start, end in pieces:
+        if chunks and end - chunks[-1][0] <= window:
+            chunks[-1][1] = end
+        else:
+            chunks.append([start, end])
+
+    return [
+        {"start": (offset + start) / SAMPLE_RATE, "end": (offset + end) / SAMPLE_RATE}
+        for start, end in chunks
+    ]
+
+
+def transcribe_batch(audio_paths, config=None, batch_size=8):
+    """
+    Transcribe every clip's TTS audio in one batched Whisper pass.
+    Items are file paths or 16 kHz float32 arrays.
+
+    Clips are joined on one timeline, speech chunks are cut per clip
+    (never across clips) and fed to BatchedInferencePipeline as
+    clip_timestamps (seconds on the joined timeline, as are the
+    segment times that come back). Returns one transcript per input
+    path, in the same shape as production_highlight_matcher.transcribe().
+    """
+    from faster_whisper import BatchedInferencePipeline, decode_audio
+
+    if not audio_paths:
+        return []
+
+    gap = np.zeros(int(CLIP_GAP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+
+    parts = []
+    spans = []
+    chunks = []
+    counts = []   # speech chunks per clip
+    offset = 0   # samples into the joined timeline
+
+    for path in audio_paths:
+        if isinstance(path, np.ndarray):
+            audio = path.astype(np.float32, copy=False)
+        else:
+            audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+
+        own = _speech_chunks(audio, offset)
+        chunks.extend(own)
+        counts.append(len(own))
+        spans.append((offset / SAMPLE_RATE, (offset + len(audio)) / SAMPLE_RATE))
+
+        parts.extend([audio, gap])
+        offset += len(audio) + len(gap)
+
+    joined = np.concatenate(parts)
+
+    joined_end = len(joined) / SAMPLE_RATE
+    if any(c["end"] > joined_end + 1e-6 for c in chunks):
+        raise RuntimeError("❌ Speech chunk past the end of the joined audio")
+
+    model = load_whisper("small", config=config)
+    pipeline = BatchedInferencePipeline(model=model)
+
+    segments, _ = pipeline.transcribe(
+        joined,
+        language="en",
+        task="transcribe",
+        word_timestamps=True,
+        vad_filter=False,
+        clip_timestamps=chunks,
+        batch_size=batch_size,
+    )
+    segments = list(segments)
+
+    # ------------------------------------------------------
+    # Slice results back per clip
+    # ------------------------------------------------------
+    transcripts = []
+
+    for i, (start, end) in enumerate(spans):
+        own = [s for s in segments if start <= s.start < end]
+        transcripts.append(collect_words(own, offset=start))
+
+        if counts[i] and not transcripts[-1]["words"]:
+            print(f"⚠️ Batched Whisper: clip {i + 1} has speech but no words")
+
+    return transcripts
+
+
+# ======================================================
+# SELF-CHECK: python -m engine.batch_transcriber a.wav b.wav ...
+# Each clip's batched words must match its own single-clip pass.
+# ======================================================
+
+if __name__ == "__main__":
+    import sys
+
+    from engine.production_highlight_matcher import transcribe
+
+    paths = sys.argv[1:]
+    if len(paths) < 2:
+        raise SystemExit("usage: python -m engine.batch_transcriber a.wav b.wav ...")
+
+    failed = False
+    for path, batched in zip(paths, transcribe_batch(paths)):
+        single = [w["word"] for w in transcribe(path)["words"]]
+        got = [w["word"] for w in batched["words"]]
+
+        shared = len(set(single) & set(got))
+        ok = bool(got) and shared >= 0.8 * len(set(single))
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {path}: {len(got)} words batched, {len(single)} single")
+
+    if failed:
+        raise SystemExit("❌ Batched transcripts don't match their clips")
@@ -25,6 +25,9 @@ HF_STORE = PROJECT_ROOT / "hfstore"
 REF_DIR  = PROJECT_ROOT / "ref"
 OUT_DIR  = PROJECT_ROOT / "outputs" / "temp" / "audio"
 
+# Canonical faster-whisper model dir (see engine.whisper_runtime)
+from engine.whisper_runtime import WHISPER_DIR  # noqa: E402
+
 os.environ["HF_HOME"] = str(HF_STORE)
 os.environ["HUGGINGFACE_HUB_CACHE"] = str(HF_STORE)
 os.environ["TRANSFORMERS_CACHE"] = str(HF_STORE)
@@ -1,21 +1,25 @@
 import os
 import time
+import uuid
+import numpy as np
+import soundfile as sf
 from elevenlabs.client import ElevenLabs
 from elevenlabs import VoiceSettings
 
 TMP_AUDIO_DIR = "/tmp/audio"
+PCM_SAMPLE_RATE = 24000
 
 class ElevenLabsEngine:
     def __init__(self, voice_id):
-        self.client = ElevenLabs(api_key=os.getenv("ELEVEN_API_KEY"))
+        # ELEVEN_BASE_URL points the client at a local fake server in tests
+        self.client = ElevenLabs(
+            api_key=os.getenv("ELEVEN_API_KEY"),
+            base_url=os.getenv("ELEVEN_BASE_URL") or None
+        )
         self.voice_id = voice_id
 
-    def synthesize(self, text):
-        os.makedirs(TMP_AUDIO_DIR, exist_ok=True)
-
-        out = f"{TMP_AUDIO_DIR}/tts_{int(time.time()*1000)}.mp3"
-
-        audio_stream = self.client.text_to_speech.convert(
+    def _convert(self, text, **kwargs):
+        return self.client.text_to_speech.convert(
             text=text,
             voice_id=self.voice_id,
             model_id="eleven_multilingual_v2",
@@ -23,12 +27,37 @@ class ElevenLabsEngine:
                 stability=0.5,
                 similarity_boost=0.75,
                 use_speaker_boost=True
-            )
+            ),
+            **kwargs
         )
 
+    def _out_path(self, ext):
+        os.makedirs(TMP_AUDIO_DIR, exist_ok=True)
+        return f"{TMP_AUDIO_DIR}/tts_{int(time.time()*1000)}_{uuid.uuid4().hex[:6]}.{ext}"
+
+    def synthesize(self, text):
+        out = self._out_path("mp3")
+        audio_stream = self._convert(text)
+
         with open(out, "wb") as f:
             for chunk in audio_stream:
                 if chunk:
                     f.write(chunk)
 
         return out
+
+    def synthesize_pcm(self, text, sample_rate=PCM_SAMPLE_RATE):
+        """
+        Raw 16-bit PCM from the API (no MP3 to decode) →
+        (float32 samples, sample_rate, wav_path).
+        """
+        raw = b"".join(
+            chunk for chunk in self._convert(text, output_format=f"pcm_{sample_rate}")
+            if chunk
+        )
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+
+        out = self._out_path("wav")
+        sf.write(out, samples, sample_rate)
+
+        return samples, sample_rate, out
@@ -1,18 +1,51 @@
 # engine/f5_engine.py
 
 import os
+import re
 import time
 import torch
 import numpy as np
 import soundfile as sf
 from pathlib import Path
 from f5_tts.api import F5TTS
+from f5_tts.infer.utils_infer import (
+    chunk_text,
+    preprocess_ref_audio_text,
+    target_sample_rate,
+)
+from f5_tts.model.utils import convert_char_to_pinyin
 
 from .config import REF_DIR, OUT_DIR
 
+# Generation settings (shared by single and batched synthesis)
+TARGET_RMS = 0.14
+CFG_STRENGTH = 2.5
+CROSS_FADE = 0.18
+NFE_STEP = 36
+SWAY_SAMPLING = -1.0
+SPEED = 1.0
+
+# F5TTS.infer: texts under this many UTF-8 bytes are spoken at
+# SHORT_TEXT_SPEED so they get enough frames
+SHORT_TEXT_BYTES = 10
+SHORT_TEXT_SPEED = 0.3
+
+
+def split_sentences(text, max_chars):
+    """
+    Sentence boundaries first, then F5's own chunking for any
+    sentence still longer than `max_chars`.
+    """
+    parts = re.split(r"(?<=[.!?।])\s+", text.strip())
+    chunks = []
+    for p in parts:
+        if p:
+            chunks.extend(chunk_text(p, max_chars=max_chars))
+    return chunks
+
 
 class VoiceCloneEngine:
-    def __init__(self, model_name="F5TTS_v1_Base"):
+    def __init__(self, model_name="F5TTS_v1_Base", batch_size=4):
         device = "cuda" if torch.cuda.is_available() else "cpu"
 
         # --------------------------------------------------
@@ -61,33 +94,208 @@ class VoiceCloneEngine:
         if not self.ref_audio.exists():
             raise FileNotFoundError(f"Missing reference audio: {self.ref_audio}")
 
+        self.batch_size = batch_size
+        self.ref = self._prepare_reference()
+
     def _load_ref_text(self):
         ref_text_file = Path(REF_DIR) / "ref_text.txt"
         if not ref_text_file.exists():
             raise FileNotFoundError("Missing ref_text.txt")
         return ref_text_file.read_text(encoding="utf8").strip()
 
-    def synthesize(self, target_text: str) -> str:
-        wav, sr, _ = self.model.infer(
-            ref_file=str(self.ref_audio),
-            ref_text=self.ref_text,
-            gen_text=target_text.strip(),
-            target_rms=0.14,
-            cfg_strength=2.5,
-            cross_fade_duration=0.18,
-            nfe_step=36,
-            speed=1.0,
+    # --------------------------------------------------
+    # REFERENCE (computed once per engine)
+    # --------------------------------------------------
+    def _prepare_reference(self):
+        """
+        Clip / resample / normalize the reference once and keep its
+        mel features and tokens for every later generation.
+        """
+        import torchaudio
+
+        ref_file, ref_text = preprocess_ref_audio_text(
+            str(self.ref_audio), self.ref_text
         )
 
-        if isinstance(wav, torch.Tensor):
-            wav = wav.detach().cpu().numpy()
-        if wav.ndim > 1:
-            wav = wav[0]
+        audio, sr = torchaudio.load(ref_file)
+        if audio.shape[0] > 1:
+            audio = torch.mean(audio, dim=0, keepdim=True)
+
+        rms = torch.sqrt(torch.mean(torch.square(audio))).item()
+        if rms < TARGET_RMS:
+            audio = audio * TARGET_RMS / rms
+
+        if sr != target_sample_rate:
+            audio = torchaudio.transforms.Resample(sr, target_sample_rate)(audio)
+
+        model = self.model.ema_model
+        audio = audio.to(self.model.device)
+
+        with torch.inference_mode():
+            mel = model.mel_spec(audio).permute(0, 2, 1)  # (1, n, d)
+
+        seconds = audio.shape[-1] / target_sample_rate
+
+        return {
+            "text": ref_text,
+            "tokens": convert_char_to_pinyin([ref_text])[0],
+            "mel": mel,
+            "frames": mel.shape[1],
+            "rms": rms,
+            "max_chars": int(
+                len(ref_text.encode("utf-8")) / seconds * (22 - seconds) * SPEED
+            ),
+        }
+
+    # --------------------------------------------------
+    # GENERATION
+    # --------------------------------------------------
+    def _duration(self, text):
+        ref = self.ref
+        ref_bytes = len(ref["text"].encode("utf-8"))
+        gen_bytes = len(text.encode("utf-8"))
+        speed = SHORT_TEXT_SPEED if gen_bytes < SHORT_TEXT_BYTES else SPEED
+        return ref["frames"] + int(ref["frames"] / ref_bytes * gen_bytes / speed)
+
+    def _decode(self, mel):
+        mel = mel.permute(0, 2, 1).to(torch.float32)  # (1, d, n)
+
+        if self.model.mel_spec_type == "vocos":
+            wave = self.model.vocoder.decode(mel)
+        else:
+            wave = self.model.vocoder(mel)
+
+        if self.ref["rms"] < TARGET_RMS:
+            wave = wave * self.ref["rms"] / TARGET_RMS
+
+        return wave.squeeze().cpu().numpy()
+
+    def _generate(self, texts):
+        """
+        One batched CFM pass over `texts` (already chunk-sized).
+        Returns one waveform per text.
+        """
+        ref = self.ref
+        n = len(texts)
+
+        tokens = [
+            ref["tokens"] + convert_char_to_pinyin([t])[0] for t in texts
+        ]
+        durations = torch.tensor(
+            [self._duration(t) for t in texts], device=self.model.device
+        )
+        lens = torch.full((n,), ref["frames"], device=self.model.device)
 
+        with torch.inference_mode():
+            out, _ = self.model.ema_model.sample(
+                cond=ref["mel"].expand(n, -1, -1),
+                text=tokens,
+                duration=durations,
+                lens=lens,
+                steps=NFE_STEP,
+                cfg_strength=CFG_STRENGTH,
+                sway_sampling_coef=SWAY_SAMPLING,
+            )
+
+        return [
+            self._decode(out[i:i + 1, ref["frames"]:int(durations[i])])
+            for i in range(n)
+        ]
+
+    @staticmethod
+    def _cross_fade(waves, sr):
+        if not waves:
+            return np.zeros(0, dtype=np.float32)
+
+        out = waves[0]
+        for nxt in waves[1:]:
+            fade = min(int(CROSS_FADE * sr), len(out), len(nxt))
+            if fade <= 0:
+                out = np.concatenate([out, nxt])
+                continue
+
+            ramp = np.linspace(1, 0, fade, dtype=np.float32)
+            mixed = out[-fade:] * ramp + nxt[:fade] * (1 - ramp)
+            out = np.concatenate([out[:-fade], mixed, nxt[fade:]])
+
+        return out
+
+    def _write(self, wav, sr, idx=0):
         out_dir = Path(OUT_DIR)
         out_dir.mkdir(parents=True, exist_ok=True)
 
-        out_path = out_dir / f"f5_{int(time.time()*1000)}.wav"
+        out_path = out_dir / f"f5_{int(time.time()*1000)}_{idx}.wav"
         sf.write(out_path, wav, sr)
 
         return str(out_path)
+
+    def synthesize_many(self, target_texts: list[str]) -> list[str]:
+        """
+        Synthesize several scripts in batched model passes.
+        Every script is chunked like F5 does, all chunks of all
+        scripts share batches, then each script's chunks are
+        cross-faded back together. Returns one WAV path per script.
+        """
+        chunked = [
+            chunk_text(text.strip(), max_chars=self.ref["max_chars"])
+            for text in target_texts
+        ]
+        jobs = [
+            (ti, ci, chunk)
+            for ti, chunks in enumerate(chunked)
+            for ci, chunk in enumerate(chunks)
+        ]
+
+        # longest first → less padding per batch
+        jobs.sort(key=lambda j: -self._duration(j[2]))
+
+        waves = {}
+        for i in range(0, len(jobs), self.batch_size):
+            batch = jobs[i:i + self.batch_size]
+            for (ti, ci, _), wav in zip(batch, self._generate([c for _, _, c in batch])):
+                waves[(ti, ci)] = wav
+
+        outputs = []
+        for ti, chunks in enumerate(chunked):
+            wav = self._cross_fade(
+                [waves[(ti, ci)] for ci in range(len(chunks))],
+                target_sample_rate
+            )
+            outputs.append(self._write(wav, target_sample_rate, ti))
+
+        return outputs
+
+    def synthesize(self, target_text: str) -> str:
+        return self.synthesize_many([target_text])[0]
+
+    # --------------------------------------------------
+    # STREAMING
+    # --------------------------------------------------
+    def synthesize_stream(self, target_text: str):
+        """
+        Yield one dict per sentence chunk as soon as it is generated:
+          {"audio", "sr", "offset", "text"}
+        `offset` is the chunk's start (seconds) in the WAV that
+        stitch() builds from the same chunks.
+        """
+        sr = target_sample_rate
+        fade_len = int(CROSS_FADE * sr)
+        total = 0
+
+        for i, chunk in enumerate(
+            split_sentences(target_text, self.ref["max_chars"])
+        ):
+            wav = self._generate([chunk])[0]
+
+            fade = min(fade_len, total, len(wav)) if i else 0
+            offset = total - fade
+            total = offset + len(wav)
+
+            yield {"audio": wav, "sr": sr, "offset": offset / sr, "text": chunk}
+
+    def stitch(self, chunks) -> str:
+        """
+        Cross-fade streamed chunks into one WAV (same fade as batch).
+        """
+        wav = self._cross_fade([c["audio"] for c in chunks], target_sample_rate)
+        return self._write(wav, target_sample_rate)
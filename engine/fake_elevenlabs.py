@@ -0,0 +1,198 @@
+# engine/fake_elevenlabs.py
+#
+# Local stand-in for the ElevenLabs text-to-speech endpoint, enforcing
+# a plan's concurrency and characters-per-minute limits with 429s.
+# Point the client at it with ELEVEN_BASE_URL to exercise the limiter:
+#
+#   python -m engine.fake_elevenlabs --check 20
+#
+# starts the server, fires 20 concurrent ElevenLabsBackend requests
+# through the limiter and fails if any of them was throttled. The check
+# uses a short quota window (--window, default 5 s) on both sides so the
+# characters limit is actually exceeded without waiting minutes.
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECONDS_PER_CHAR = 0.06
+# silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz)
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+MP3_FRAME_SECONDS = 1152 / 44100
+
+TTS_PATH = re.compile(r"^/v1/text-to-speech/([^/?]+)(?:/stream)?(?:\?(.*))?$")
+
+
+class FakeElevenLabs(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, addr, concurrency=2, chars_per_minute=None, latency=0.2, window=60.0
+    ):
+        super().__init__(addr, _Handler)
+        self.concurrency = concurrency
+        self.chars_per_minute = chars_per_minute   # per `window` seconds
+        self.latency = latency
+        self.window_seconds = window
+
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.window = deque()   # (time, chars) in the last `window` s
+        self.requests = 0
+        self.throttled = 0
+
+    def admit(self, chars) -> bool:
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            while self.window and now - self.window[0][0] > self.window_seconds:
+                self.window.popleft()
+
+            used = sum(c for _, c in self.window)
+            if self.in_flight >= self.concurrency or (
+                self.chars_per_minute and used + chars > self.chars_per_minute
+            ):
+                self.throttled += 1
+                return False
+
+            self.in_flight += 1
+            self.window.append((now, chars))
+            return True
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        match = TTS_PATH.match(self.path)
+        if not match:
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        text = body.get("text", "")
+        query = dict(p.split("=", 1) for p in (match.group(2) or "").split("&") if "=" in p)
+        output_format = query.get("output_format", "mp3_44100_128")
+
+        server = self.server
+        if not server.admit(len(text)):
+            self._json(429, {"detail": {"status": "too_many_concurrent_requests"}})
+            return
+
+        # the slot is freed before the reply is sent, as the client
+        # releases its own slot as soon as the body is read
+        try:
+            time.sleep(server.latency)
+        finally:
+            server.done()
+
+        seconds = max(len(text) * SECONDS_PER_CHAR, 0.1)
+        if output_format.startswith("pcm_"):
+            sr = int(output_format.split("_")[1])
+            audio, mime = b"\x00\x00" * int(seconds * sr), "audio/pcm"
+        else:
+            audio, mime = MP3_FRAME * int(seconds / MP3_FRAME_SECONDS + 1), "audio/mpeg"
+
+        self.send_response(200)
+        self.send_header("Content-Type", mime)
+        self.send_header("Content-Length", str(len(audio)))
+        self.end_headers()
+        self.wfile.write(audio)
+
+    def _json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(port=0, **limits) -> FakeElevenLabs:
+    """
+    Start the fake API on a background thread; .server_address has
+    the bound port.
+    """
+    server = FakeElevenLabs(("127.0.0.1", port), **limits)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check(requests, concurrency, chars_per_minute, text, window=5.0):
+    """
+    Fire `requests` parallel syntheses through ElevenLabsBackend with the
+    limiter set to the server's plan; returns the server's counters.
+    """
+    from engine.tts_backends import ElevenLabsBackend
+
+    server = serve(
+        concurrency=concurrency, chars_per_minute=chars_per_minute, window=window
+    )
+    os.environ["ELEVEN_BASE_URL"] = "http://%s:%d" % server.server_address
+    os.environ.setdefault("ELEVEN_API_KEY", "fake")
+
+    backend = ElevenLabsBackend("fake-voice", {
+        "ELEVEN_MAX_CONCURRENCY": concurrency,
+        "ELEVEN_CHARS_PER_MINUTE": chars_per_minute,
+        "ELEVEN_RATE_WINDOW": window,
+    })
+
+    errors = []
+
+    def one(_):
+        try:
+            backend.synthesize(text)
+        except Exception as e:
+            errors.append(e)
+
+    with ThreadPoolExecutor(max_workers=requests) as pool:
+        list(pool.map(one, range(requests)))
+
+    server.shutdown()
+    return server.requests, server.throttled, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake ElevenLabs TTS server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--chars-per-minute", type=int, default=None,
+                        help="characters per window (--check default: 200)")
+    parser.add_argument("--window", type=float, default=None,
+                        help="quota window in seconds (default 60, --check: 5)")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--check", type=int, metavar="N",
+                        help="run N concurrent requests through the limiter and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        total, throttled, errors = check(
+            args.check, args.concurrency, args.chars_per_minute or 200,
+            "Three bedrooms, two baths, garden view.",
+            window=args.window or 5.0,
+        )
+        print(f"requests={total} throttled={throttled} errors={len(errors)}")
+        if throttled or errors:
+            raise SystemExit("❌ Limiter let requests over the plan limits")
+        print("✅ No request exceeded the plan limits")
+    else:
+        server = FakeElevenLabs(
+            ("127.0.0.1", args.port),
+            concurrency=args.concurrency,
+            chars_per_minute=args.chars_per_minute,
+            latency=args.latency,
+            window=args.window or 60.0,
+        )
+        print(f"🎙️ Fake ElevenLabs on http://127.0.0.1:{args.port}")
+        server.serve_forever()
@@ -1,24 +1,20 @@
 # engine/forced_aligner.py
 
 import re
-from faster_whisper import WhisperModel
-from engine.config import HF_STORE
+from engine.whisper_runtime import load_whisper
 def normalize(text):
     return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", text.upper())).strip()
 
-def force_align(audio_path, full_text, device="cuda"):
+def force_align(audio_path, full_text, device=None, config=None):
     """
     Returns word-level timestamps aligned to KNOWN text.
     GUARANTEED MATCH.
     """
 
-    model = WhisperModel(
-        "large-v3",
-        device=device,
-        compute_type="float16",
-        download_root=str(HF_STORE),
-        local_files_only=True
-    )
+    if device:
+        config = {**(config or {}), "WHISPER_DEVICE": device}
+
+    model = load_whisper("large-v3", config=config)
 
     # 🔒 Important: We pass the known text
     segments, _ = model.transcribe(
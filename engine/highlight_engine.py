@@ -1,8 +1,15 @@
 from .production_highlight_matcher import extract_highlights
 
 class HighlightEngine:
-    def __init__(self, audio_path):
+    def __init__(self, audio_path, config=None, transcript=None):
         self.audio_path = audio_path
+        self.config = config
+        self.transcript = transcript
 
     def run(self, highlights):
-        return extract_highlights(self.audio_path, highlights)
+        return extract_highlights(
+            self.audio_path,
+            highlights,
+            config=self.config,
+            transcript=self.transcript
+        )
@@ -1,6 +1,4 @@
-from faster_whisper import WhisperModel
+from engine.whisper_runtime import load_whisper
 
-WhisperModel(
-    "large-v3",
-    download_root="hfstore/whisper"
-)
+# Fetch the model into WHISPER_DIR on the resolved device / compute type
+load_whisper("large-v3", local_files_only=False)
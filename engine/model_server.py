@@ -0,0 +1,285 @@
+# engine/model_server.py
+#
+# One process per node holding the plate detector and Whisper.
+# Workers / UI sessions connect over a Unix socket; concurrent
+# requests are merged into dynamic batches.
+#
+#   python -m engine.model_server --plate-model models/lp_key_point.pt
+
+import argparse
+import os
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+SOCKET_PATH = os.getenv("MODEL_SERVER_SOCKET", "/tmp/bluvo_models.sock")
+
+# Connections unpickle what they receive, so the key must stay secret:
+# MODEL_SERVER_KEY, or a random key the server writes to KEY_PATH (0600)
+KEY_PATH = os.getenv(
+    "MODEL_SERVER_KEY_FILE", os.path.expanduser("~/.bluvo_model_server.key")
+)
+
+
+def auth_key(create=False) -> bytes:
+    """
+    MODEL_SERVER_KEY, else the key file. The server (`create`) makes a
+    random one on first start; clients only read it.
+    """
+    if os.getenv("MODEL_SERVER_KEY"):
+        return os.environ["MODEL_SERVER_KEY"].encode()
+
+    if create and not os.path.exists(KEY_PATH):
+        try:
+            fd = os.open(KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+
+    try:
+        with open(KEY_PATH) as f:
+            return f.read().strip().encode()
+    except FileNotFoundError:
+        raise RuntimeError(
+            f"❌ No model server key: set MODEL_SERVER_KEY or start the server "
+            f"(it writes {KEY_PATH})"
+        )
+
+
+# ======================================================
+# DYNAMIC BATCHING
+# ======================================================
+
+class DynamicBatcher:
+    """
+    Collects requests for up to `max_wait` seconds (or `max_batch`
+    items) after the first one arrives, then runs `fn(items)` once.
+    `fn` returns one result per item.
+    """
+
+    def __init__(self, fn, max_batch=16, max_wait=0.01):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.pending = queue.Queue()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, item):
+        fut = Future()
+        self.pending.put((item, fut))
+        return fut.result()
+
+    def _loop(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=left))
+                except queue.Empty:
+                    break
+
+            items = [b[0] for b in batch]
+            try:
+                results = self.fn(items)
+                for (_, fut), res in zip(batch, results):
+                    fut.set_result(res)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+
+
+# ======================================================
+# SERVER
+# ======================================================
+
+class ModelServer:
+    def __init__(self, plate_model=None, whisper_config=None, max_wait=0.01):
+        self.batchers = {}
+
+        if plate_model:
+            from ultralytics import YOLO
+            self.yolo = YOLO(plate_model)
+            self.batchers["detect"] = DynamicBatcher(
+                self._detect_batch, max_batch=32, max_wait=max_wait
+            )
+
+        self.whisper_config = whisper_config
+        self.batchers["transcribe"] = DynamicBatcher(
+            self._transcribe_batch, max_batch=16, max_wait=max_wait * 5
+        )
+
+    def _detect_batch(self, items):
+        """
+        items: {"frame", "imgsz", "conf"} → (N, 4) xyxy per item.
+        Frames with the same settings share one YOLO call.
+        """
+        out = [None] * len(items)
+        groups = {}
+        for i, it in enumerate(items):
+            groups.setdefault((it["imgsz"], it["conf"]), []).append(i)
+
+        for (imgsz, conf), idxs in groups.items():
+            results = self.yolo(
+                [items[i]["frame"] for i in idxs],
+                imgsz=imgsz,
+                conf=conf,
+                verbose=False
+            )
+            for i, r in zip(idxs, results):
+                out[i] = r.boxes.xyxy.cpu().numpy()
+
+        return out
+
+    def _transcribe_batch(self, items):
+        """
+        items: list of audio paths / arrays per request → flattened
+        into ONE batched Whisper pass, then split back per request.
+        """
+        from engine.batch_transcriber import transcribe_batch
+
+        flat = [a for it in items for a in it]
+        transcripts = transcribe_batch(flat, config=self.whisper_config)
+
+        out, pos = [], 0
+        for it in items:
+            out.append(transcripts[pos:pos + len(it)])
+            pos += len(it)
+        return out
+
+    def _serve(self, conn):
+        try:
+            while True:
+                try:
+                    req = conn.recv()
+                except EOFError:
+                    return
+
+                try:
+                    batcher = self.batchers[req["op"]]
+                    conn.send({"ok": True, "result": batcher.submit(req["data"])})
+                except Exception as e:
+                    conn.send({"ok": False, "error": f"{type(e).__name__}: {e}"})
+        finally:
+            conn.close()
+
+    def serve_forever(self, socket_path=SOCKET_PATH):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        # socket created owner-only (no window before a chmod)
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(socket_path, family="AF_UNIX", authkey=auth_key(create=True))
+        finally:
+            os.umask(old_umask)
+        os.chmod(socket_path, 0o600)
+        print(f"✅ Model server listening on {socket_path}")
+
+        try:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+
+# ======================================================
+# CLIENT
+# ======================================================
+
+class ModelClient:
+    """
+    Thread-safe client; each thread keeps its own connection.
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.socket_path = socket_path
+        self.local = threading.local()
+        self.key = auth_key()
+
+    def _call(self, op, data):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=self.key)
+            self.local.conn = conn
+
+        conn.send({"op": op, "data": data})
+        reply = conn.recv()
+        if not reply["ok"]:
+            raise RuntimeError(f"❌ Model server: {reply['error']}")
+        return reply["result"]
+
+    def detect(self, frame, imgsz=640, conf=0.5):
+        return self._call(
+            "detect",
+            {"frame": np.ascontiguousarray(frame), "imgsz": imgsz, "conf": conf}
+        )
+
+    def transcribe(self, audio):
+        """
+        List of audio paths (same node) or 16 kHz arrays →
+        one transcript per item.
+        """
+        return self._call("transcribe", list(audio))
+
+    def close(self):
+        """
+        Close this thread's connection (other threads' close when
+        their thread-local goes away).
+        """
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(socket_path=SOCKET_PATH) -> ModelClient:
+    """
+    One ModelClient per process (per-thread connections are reused).
+    """
+    global _client
+    with _client_lock:
+        if _client is None or _client.socket_path != socket_path:
+            _client = ModelClient(socket_path)
+        return _client
+
+
+class RemotePlateDetector:
+    """
+    Same predict() interface as OnnxPlateDetector, served remotely.
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.client = get_client(socket_path)
+
+    def predict(self, frame, imgsz=640, conf=0.5):
+        return self.client.detect(frame, imgsz=imgsz, conf=conf)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--socket", default=SOCKET_PATH)
+    ap.add_argument("--plate-model", default="models/lp_key_point.pt")
+    ap.add_argument("--max-wait-ms", type=float, default=10.0)
+    args = ap.parse_args()
+
+    ModelServer(
+        plate_model=args.plate_model,
+        max_wait=args.max_wait_ms / 1000.0
+    ).serve_forever(args.socket)
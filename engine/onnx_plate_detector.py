@@ -0,0 +1,323 @@
+# engine/onnx_plate_detector.py
+
+import ast
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Max box deviation allowed vs. the torch backend, as a fraction of box size
+BOX_TOLERANCE = 0.1
+
+
+# ======================================================
+# PRE / POST PROCESSING
+# ======================================================
+
+def letterbox(frame, imgsz, stride=32):
+    """
+    Resize keeping aspect ratio so the long side is `imgsz`, then pad
+    the short side only up to the next multiple of `stride` (pad value
+    114, centered) — ultralytics' LetterBox(auto=True), as used by
+    YOLO.predict on the .pt model. The exported graph is dynamic.
+    """
+    h, w = frame.shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    nw, nh = round(w * r), round(h * r)
+
+    if (nw, nh) != (w, h):
+        frame = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+    px = ((imgsz - nw) % stride) / 2
+    py = ((imgsz - nh) % stride) / 2
+    top, bottom = round(py - 0.1), round(py + 0.1)
+    left, right = round(px - 0.1), round(px + 0.1)
+
+    frame = cv2.copyMakeBorder(
+        frame, top, bottom, left, right,
+        cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+
+    return frame, r, (left, top)
+
+
+def to_tensor(frame):
+    """
+    BGR uint8 HWC → RGB float32 NCHW in [0, 1].
+    """
+    x = frame[:, :, ::-1].transpose(2, 0, 1)
+    x = np.ascontiguousarray(x, dtype=np.float32) / 255.0
+    return x[None]
+
+
+def nms(boxes, scores, iou_thres=0.7):
+    """
+    Greedy NMS over xyxy boxes. Returns kept indices, best first.
+    """
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+
+        xx1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+
+        order = order[1:][iou <= iou_thres]
+
+    return np.array(keep, dtype=int)
+
+
+def postprocess(pred, nc, conf, ratio, pad, shape, iou_thres=0.7):
+    """
+    Raw YOLOv8 head output (1, 4 + nc [+ kpts], N) → xyxy boxes in
+    source-frame coordinates, sorted by score.
+    """
+    pred = pred[0].T
+    scores = pred[:, 4:4 + nc].max(axis=1)
+
+    mask = scores > conf
+    if not mask.any():
+        return np.empty((0, 4), dtype=np.float32)
+
+    pred, scores = pred[mask], scores[mask]
+
+    cx, cy, bw, bh = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+    boxes = np.stack(
+        [cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1
+    )
+
+    boxes = boxes[nms(boxes, scores, iou_thres)]
+
+    boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)
+    boxes /= ratio
+
+    h, w = shape
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+
+    return boxes
+
+
+# ======================================================
+# CALIBRATION
+# ======================================================
+
+def load_calibration_frames(source, count=32):
+    """
+    Sample up to `count` BGR frames from a video file or a folder
+    of images.
+    """
+    source = Path(source)
+    frames = []
+
+    if source.is_dir():
+        for p in sorted(source.iterdir())[:count]:
+            img = cv2.imread(str(p))
+            if img is not None:
+                frames.append(img)
+        return frames
+
+    cap = cv2.VideoCapture(str(source))
+    if not cap.isOpened():
+        raise RuntimeError(f"❌ Cannot open calibration source: {source}")
+
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+    for idx in np.linspace(0, total - 1, min(count, total)).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+
+    cap.release()
+    return frames
+
+
+class _FrameCalibrationReader:
+    """
+    onnxruntime CalibrationDataReader over preprocessed frames.
+    """
+
+    def __init__(self, input_name, frames, imgsz):
+        self.feeds = iter(
+            {input_name: to_tensor(letterbox(f, imgsz)[0])} for f in frames
+        )
+
+    def get_next(self):
+        return next(self.feeds, None)
+
+
+# ======================================================
+# EXPORT + QUANTIZE (ONCE)
+# ======================================================
+
+def build_onnx_model(
+    model_path: str,
+    imgsz: int = 640,
+    calibration=None,
+    verify: bool = True,
+) -> str:
+    """
+    Export `model_path` (.pt) to ONNX next to it and, when a
+    calibration source is given, quantize it to static int8.
+    Existing artifacts are reused.
+    """
+    pt = Path(model_path)
+    fp32 = pt.with_suffix(".onnx")
+    int8 = pt.with_name(f"{pt.stem}.int8.onnx")
+
+    if calibration is None:
+        target = fp32
+    else:
+        target = int8
+
+    if target.exists():
+        return str(target)
+
+    if not fp32.exists():
+        from ultralytics import YOLO
+
+        exported = YOLO(str(pt)).export(
+            format="onnx",
+            imgsz=imgsz,
+            dynamic=True,
+            simplify=True,
+        )
+        if Path(exported) != fp32:
+            os.replace(exported, fp32)
+
+    if calibration is None:
+        return str(fp32)
+
+    import onnxruntime as ort
+    from onnxruntime.quantization import (
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    frames = load_calibration_frames(calibration)
+    if not frames:
+        raise RuntimeError("❌ No calibration frames found")
+
+    input_name = ort.InferenceSession(
+        str(fp32), providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    reader = _FrameCalibrationReader(input_name, frames, imgsz)
+
+    prep = pt.with_name(f"{pt.stem}.prep.onnx")
+    tmp = int8.with_suffix(".tmp")
+
+    try:
+        quant_pre_process(str(fp32), str(prep))
+        quantize_static(
+            str(prep),
+            str(tmp),
+            reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+
+        if verify:
+            verify_against_torch(str(pt), str(tmp), frames, imgsz=imgsz)
+
+        os.replace(tmp, int8)
+
+    finally:
+        for f in (prep, tmp):
+            if f.exists():
+                f.unlink()
+
+    return str(int8)
+
+
+def verify_against_torch(
+    pt_path: str,
+    onnx_path: str,
+    frames,
+    imgsz: int = 640,
+    conf: float = 0.5,
+    tolerance: float = BOX_TOLERANCE,
+):
+    """
+    Compare the top box per frame between the torch model and the
+    ONNX model. Raises if any box deviates by more than `tolerance`
+    of the torch box size, or if only one backend finds a plate.
+    """
+    from ultralytics import YOLO
+
+    ref = YOLO(pt_path)
+    det = OnnxPlateDetector(onnx_path)
+
+    for i, frame in enumerate(frames):
+        results = ref(frame, imgsz=imgsz, conf=conf, verbose=False)
+        a = results[0].boxes.xyxy.cpu().numpy() if results else np.empty((0, 4))
+        b = det.predict(frame, imgsz=imgsz, conf=conf)
+
+        if len(a) == 0 and len(b) == 0:
+            continue
+
+        if len(a) == 0 or len(b) == 0:
+            raise RuntimeError(
+                f"❌ ONNX backend mismatch on calibration frame {i}: "
+                f"torch={len(a)} boxes, onnx={len(b)} boxes"
+            )
+
+        size = np.array([a[0, 2] - a[0, 0], a[0, 3] - a[0, 1]] * 2)
+        err = np.abs(a[0] - b[0]) / np.maximum(size, 1.0)
+
+        if err.max() > tolerance:
+            raise RuntimeError(
+                f"❌ ONNX box deviates {err.max():.2f} (> {tolerance}) "
+                f"on calibration frame {i}"
+            )
+
+
+# ======================================================
+# DETECTOR
+# ======================================================
+
+class OnnxPlateDetector:
+    """
+    CPU onnxruntime replacement for ultralytics.YOLO inference.
+    """
+
+    def __init__(self, onnx_path: str, threads: int = 0, iou: float = 0.7):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            onnx_path, sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.iou = iou
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        names = ast.literal_eval(meta.get("names", "{0: 'plate'}"))
+        self.nc = len(names)
+
+    def predict(self, frame, imgsz: int = 640, conf: float = 0.5):
+        """
+        Returns an (N, 4) float array of xyxy boxes, best first.
+        """
+        img, ratio, pad = letterbox(frame, imgsz)
+        pred = self.session.run(None, {self.input_name: to_tensor(img)})[0]
+
+        return postprocess(
+            pred, self.nc, conf, ratio, pad, frame.shape[:2], self.iou
+        )
@@ -1,8 +1,92 @@
 # engine/plate_processor.py
 
+from contextlib import nullcontext
+
 import cv2
 import numpy as np
-from ultralytics import YOLO
+
+# Inference sizes the detector may pick from (multiples of YOLO stride 32)
+IMGSZ_STEPS = (320, 480, 640, 960, 1280)
+
+# Frames without a plate between probes at the next larger size
+PROBE_INTERVAL = 15
+
+STRIDE = 32
+
+
+def _stride_floor(size):
+    """
+    Round an inference size down to the YOLO stride (the dynamic
+    ONNX graph's upsample/concat needs multiples of 32).
+    """
+    return max(STRIDE, int(size) // STRIDE * STRIDE)
+
+# PyAV output codecs: (encoder, options)
+AV_CODECS = {
+    "h264": ("libx264", {"preset": "veryfast", "crf": "16"}),
+    "lossless": ("libx264", {"preset": "ultrafast", "qp": "0"}),
+}
+
+
+def _plane_view(plane, rows, cols):
+    """
+    Writable (rows, cols) uint8 view over a frame plane, row padding
+    (line_size) skipped.
+    """
+    data = np.frombuffer(plane, dtype=np.uint8).reshape(rows, plane.line_size)
+    return data[:, :cols]
+
+
+class _I420Buffers:
+    """
+    yuv420p frame → BGR → yuv420p with every pixel buffer allocated
+    once per clip: decoded planes are packed into one I420 array, cv2
+    converts it into a reused BGR array (blurred in place) and back,
+    and the result fills the planes of one reused output frame.
+    Reusing that frame is safe with AV_CODECS' libx264, which copies
+    its input picture during encode.
+    """
+
+    def __init__(self, av, width, height):
+        self.w, self.h = width, height
+        cw, ch = width // 2, height // 2
+
+        self.i420 = np.empty((height * 3 // 2, width), dtype=np.uint8)
+        self.bgr = np.empty((height, width, 3), dtype=np.uint8)
+
+        chroma = self.i420[height:].reshape(-1)
+        self.packed = (
+            (self.i420[:height], height, width),
+            (chroma[:cw * ch].reshape(ch, cw), ch, cw),
+            (chroma[cw * ch:].reshape(ch, cw), ch, cw),
+        )
+
+        self.frame = av.VideoFrame(width, height, "yuv420p")
+        self.out = [
+            _plane_view(plane, rows, cols)
+            for plane, (_, rows, cols) in zip(self.frame.planes, self.packed)
+        ]
+
+    @staticmethod
+    def fits(frame) -> bool:
+        return (
+            frame.format.name == "yuv420p"
+            and frame.width % 2 == 0 and frame.height % 2 == 0
+        )
+
+    def to_bgr(self, frame):
+        for plane, (dst, rows, cols) in zip(frame.planes, self.packed):
+            np.copyto(dst, _plane_view(plane, rows, cols))
+        return cv2.cvtColor(self.i420, cv2.COLOR_YUV2BGR_I420, dst=self.bgr)
+
+    def from_bgr(self, like):
+        cv2.cvtColor(self.bgr, cv2.COLOR_BGR2YUV_I420, dst=self.i420)
+        for dst, (src, _, _) in zip(self.out, self.packed):
+            np.copyto(dst, src)
+
+        self.frame.pts = like.pts
+        self.frame.time_base = like.time_base
+        return self.frame
 
 
 class PlateBlurProcessor:
@@ -12,20 +96,243 @@ class PlateBlurProcessor:
         conf: float = 0.5,
         buffer_size: int = 5,
         blur_kernel=(49, 49),
+        imgsz: int = 640,
+        adaptive_imgsz: bool = True,
+        min_plate_px: int = 24,
+        refine: bool = False,
+        refine_pad: float = 0.5,
+        backend: str = "torch",
+        onnx_calibration=None,
+        onnx_threads: int = 0,
+        io: str = "opencv",
+        io_threads: int = 0,
+        io_codec: str = "h264",
+        slot=None,
     ):
-        self.model = YOLO(model_path)
+        # --------------------------------------------------
+        # Detector backend
+        # torch → ultralytics.YOLO (GPU / CPU)
+        # onnx  → onnxruntime CPU, int8 when calibrated
+        # server → shared node-local model server (engine.model_server)
+        # --------------------------------------------------
+        self.backend = backend
+
+        if backend == "torch":
+            from ultralytics import YOLO
+            self.model = YOLO(model_path)
+        elif backend == "onnx":
+            from engine.onnx_plate_detector import (
+                OnnxPlateDetector,
+                build_onnx_model,
+            )
+            onnx_path = build_onnx_model(
+                model_path, imgsz=imgsz, calibration=onnx_calibration
+            )
+            self.model = OnnxPlateDetector(onnx_path, threads=onnx_threads)
+        elif backend == "server":
+            from engine.model_server import RemotePlateDetector
+            self.model = RemotePlateDetector()
+        else:
+            raise ValueError(f"Unknown plate backend: {backend}")
+
         self.conf = conf
         self.buffer_size = buffer_size
         self.blur_kernel = blur_kernel
         self.bbox_buffer = []
 
+        # Downscaled inference
+        self.imgsz = imgsz
+        self.adaptive_imgsz = adaptive_imgsz
+        self.min_plate_px = min_plate_px
+        self.plate_heights = []
+        self.misses = 0
+
+        # Optional full-res refinement crop around each box
+        self.refine = refine
+        self.refine_pad = refine_pad
+
+        # Video I/O
+        # opencv → cv2.VideoCapture / VideoWriter("mp4v"), no audio
+        # pyav   → threaded libav decode, H.264 / lossless encode,
+        #          audio + timestamps passed through
+        if io not in ("opencv", "pyav"):
+            raise ValueError(f"Unknown plate I/O backend: {io}")
+        if io_codec not in AV_CODECS:
+            raise ValueError(f"Unknown plate I/O codec: {io_codec}")
+
+        self.io = io
+        self.io_threads = io_threads
+        self.io_codec = io_codec
+
+        # Taken around each frame's detection only (e.g. jobs.gpu_slot),
+        # so other GPU stages interleave with a long blur
+        self.slot = slot or nullcontext
+
     def _smooth_bbox(self, bbox):
         self.bbox_buffer.append(bbox)
         if len(self.bbox_buffer) > self.buffer_size:
             self.bbox_buffer.pop(0)
         return np.mean(self.bbox_buffer, axis=0).astype(int)
 
-    def process(self, input_video: str, output_video: str) -> str:
+    # --------------------------------------------------
+    # ADAPTIVE INFERENCE SIZE
+    # --------------------------------------------------
+
+    def _choose_imgsz(self, frame_long_side):
+        """
+        PLATE_IMGSZ, stepped UP to the smallest step at which the
+        smallest plate seen so far still spans `min_plate_px` pixels
+        after downscaling. Never below PLATE_IMGSZ.
+        """
+        floor = _stride_floor(min(self.imgsz, frame_long_side))
+
+        if not self.adaptive_imgsz or not self.plate_heights:
+            return floor
+
+        smallest = np.percentile(self.plate_heights, 10)
+        needed = max(floor, frame_long_side * self.min_plate_px / max(smallest, 1.0))
+
+        for size in IMGSZ_STEPS:
+            if size >= needed:
+                return _stride_floor(min(size, frame_long_side))
+
+        return _stride_floor(min(max(IMGSZ_STEPS[-1], floor), frame_long_side))
+
+    def _probe_imgsz(self, imgsz, frame_long_side):
+        """
+        Next size above `imgsz` to probe for plates too small to be
+        detected at `imgsz`, or None at full resolution.
+        """
+        top = _stride_floor(frame_long_side)
+        if imgsz >= top:
+            return None
+
+        larger = next((s for s in IMGSZ_STEPS if s > imgsz), top)
+        return min(larger, top)
+
+    def _record_plate(self, box):
+        self.plate_heights.append(float(box[3] - box[1]))
+        if len(self.plate_heights) > 120:
+            self.plate_heights.pop(0)
+
+    # --------------------------------------------------
+    # DETECTION
+    # --------------------------------------------------
+
+    def _infer(self, frame, imgsz):
+        """
+        Run YOLO on a copy of `frame` downscaled so its long side is
+        `imgsz`. Returns the best box in `frame` coordinates, or None.
+        """
+        h, w = frame.shape[:2]
+        scale = imgsz / max(h, w)
+
+        if scale < 1.0:
+            small = cv2.resize(
+                frame,
+                (max(1, round(w * scale)), max(1, round(h * scale))),
+                interpolation=cv2.INTER_AREA
+            )
+        else:
+            small, scale = frame, 1.0
+
+        if self.backend in ("onnx", "server"):
+            boxes = self.model.predict(small, imgsz=imgsz, conf=self.conf)
+            if len(boxes) == 0:
+                return None
+            return boxes[0] / scale
+
+        results = self.model(small, imgsz=imgsz, conf=self.conf, verbose=False)
+
+        if not results or len(results[0].boxes) == 0:
+            return None
+
+        return results[0].boxes.xyxy[0].cpu().numpy() / scale
+
+    def _refine(self, frame, box):
+        """
+        Re-detect inside a padded full-resolution crop around `box`.
+        """
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = box
+        pw = (x2 - x1) * self.refine_pad
+        ph = (y2 - y1) * self.refine_pad
+
+        cx1, cy1 = int(max(0, x1 - pw)), int(max(0, y1 - ph))
+        cx2, cy2 = int(min(w, x2 + pw)), int(min(h, y2 + ph))
+
+        crop = frame[cy1:cy2, cx1:cx2]
+        if crop.size == 0:
+            return box
+
+        size = IMGSZ_STEPS[0]
+        found = self._infer(crop, size)
+        if found is None:
+            return box
+
+        return found + np.array([cx1, cy1, cx1, cy1])
+
+    def detect(self, frame):
+        h, w = frame.shape[:2]
+        imgsz = self._choose_imgsz(max(h, w))
+        box = self._infer(frame, imgsz)
+
+        if box is None and self.adaptive_imgsz:
+            # a plate too small for `imgsz` is never seen, so its size
+            # can't drive a step up: probe larger now and then
+            self.misses += 1
+            if self.misses % PROBE_INTERVAL == 0:
+                larger = self._probe_imgsz(imgsz, max(h, w))
+                if larger:
+                    box = self._infer(frame, larger)
+
+        if box is None:
+            return None
+
+        self.misses = 0
+
+        if self.refine:
+            box = self._refine(frame, box)
+
+        self._record_plate(box)
+        return box
+
+    def _blur_frame(self, frame):
+        """
+        Detect + blur the plate in `frame` (BGR), in place.
+        """
+        with self.slot():
+            box = self.detect(frame)
+
+        if box is not None:
+            x1, y1, x2, y2 = map(int, box)
+
+            x1, y1, x2, y2 = self._smooth_bbox([x1, y1, x2, y2])
+
+            h, w = frame.shape[:2]
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(w, x2), min(h, y2)
+
+            if x2 > x1 and y2 > y1:
+                roi = frame[y1:y2, x1:x2]
+                if roi.size > 0:
+                    frame[y1:y2, x1:x2] = cv2.GaussianBlur(
+                        roi, self.blur_kernel, 0
+                    )
+
+        return frame
+
+    def process(self, input_video: str, output_video: str, max_duration=None) -> str:
+        """
+        Blur `input_video` → `output_video`. With `max_duration`, only
+        the first seconds are read, detected and written.
+        """
+        self.plate_heights = []
+        self.misses = 0
+
+        if self.io == "pyav":
+            return self._process_av(input_video, output_video, max_duration)
+
         cap = cv2.VideoCapture(input_video)
         if not cap.isOpened():
             raise RuntimeError("❌ Cannot open input video")
@@ -41,35 +348,124 @@ class PlateBlurProcessor:
             (W, H)
         )
 
-        while True:
+        max_frames = None
+        if max_duration is not None and fps > 0:
+            max_frames = int(np.ceil(max_duration * fps))
+
+        written = 0
+        while max_frames is None or written < max_frames:
             ret, frame = cap.read()
             if not ret:
                 break
 
-            results = self.model(frame, conf=self.conf, verbose=False)
+            writer.write(self._blur_frame(frame))
+            written += 1
+
+        cap.release()
+        writer.release()
+
+        return output_video
 
-            if results and len(results[0].boxes) > 0:
-                x1, y1, x2, y2 = map(
-                    int,
-                    results[0].boxes.xyxy[0].cpu().numpy()
-                )
+    # --------------------------------------------------
+    # PYAV I/O
+    # --------------------------------------------------
 
-                x1, y1, x2, y2 = self._smooth_bbox([x1, y1, x2, y2])
+    @staticmethod
+    def _bgr_view(frame):
+        """
+        Writable (H, W, 3) view over a bgr24 frame's plane (row
+        padding skipped): no copy in, and the same frame is encoded.
+        """
+        plane = frame.planes[0]
+        rows = np.frombuffer(plane, dtype=np.uint8).reshape(frame.height, plane.line_size)
+        return rows[:, :frame.width * 3].reshape(frame.height, frame.width, 3)
 
-                h, w = frame.shape[:2]
-                x1, y1 = max(0, x1), max(0, y1)
-                x2, y2 = min(w, x2), min(h, y2)
+    def _process_av(self, input_video: str, output_video: str, max_duration=None) -> str:
+        import av
 
-                if x2 > x1 and y2 > y1:
-                    roi = frame[y1:y2, x1:x2]
-                    if roi.size > 0:
-                        frame[y1:y2, x1:x2] = cv2.GaussianBlur(
-                            roi, self.blur_kernel, 0
-                        )
+        try:
+            src = av.open(input_video)
+        except (av.error.FFmpegError, OSError) as e:
+            raise RuntimeError(f"❌ Cannot open input video: {e}")
 
-            writer.write(frame)
+        try:
+            with av.open(output_video, "w") as dst:
+                vin = src.streams.video[0]
+                vin.thread_type = "AUTO"          # frame + slice threads
+                vin.thread_count = self.io_threads
 
-        cap.release()
-        writer.release()
+                # average_rate is None for some VFR / raw streams: fall
+                # back to what libav probed (av_guess_frame_rate)
+                rate = vin.average_rate or vin.guessed_rate or vin.base_rate
+                if not rate:
+                    raise RuntimeError(f"❌ Cannot determine frame rate: {input_video}")
+
+                encoder, options = AV_CODECS[self.io_codec]
+                vout = dst.add_stream(encoder, rate=rate)
+                vout.width = vin.codec_context.width
+                vout.height = vin.codec_context.height
+                vout.pix_fmt = "yuv420p"
+                vout.time_base = vin.time_base
+                vout.options = dict(options)
+                vout.thread_count = self.io_threads
+
+                ain = src.streams.audio[0] if src.streams.audio else None
+                aout = None
+                if ain is not None:
+                    # stream copy: original audio packets + timestamps
+                    if hasattr(dst, "add_stream_from_template"):
+                        aout = dst.add_stream_from_template(ain)
+                    else:
+                        aout = dst.add_stream(template=ain)
+
+                # yuv420p (nearly every source): preallocated buffers,
+                # no per-frame pixel allocation. Anything else: one
+                # swscale context for the clip, a new bgr24 frame each
+                buffers = _I420Buffers(av, vout.width, vout.height)
+                reformatter = av.video.reformatter.VideoReformatter()
+
+                streams = [vin] + ([ain] if ain is not None else [])
+                start = float(vin.start_time * vin.time_base) if vin.start_time else 0.0
+                done = False
+
+                for packet in src.demux(*streams):
+                    if packet.stream is ain:
+                        if packet.dts is None:
+                            continue
+                        if max_duration is not None and packet.pts is not None and (
+                            float(packet.pts * packet.time_base) - start >= max_duration
+                        ):
+                            continue
+                        packet.stream = aout
+                        dst.mux(packet)
+                        continue
+
+                    if done:
+                        break   # rest of the source is never shown
+
+                    for frame in packet.decode():
+                        if max_duration is not None and frame.time is not None and (
+                            frame.time - start >= max_duration
+                        ):
+                            done = True
+                            break
+
+                        if buffers.fits(frame) and (frame.width, frame.height) == (
+                            buffers.w, buffers.h
+                        ):
+                            self._blur_frame(buffers.to_bgr(frame))
+                            dst.mux(vout.encode(buffers.from_bgr(frame)))
+                            continue
+
+                        bgr = reformatter.reformat(frame, format="bgr24")
+                        self._blur_frame(self._bgr_view(bgr))
+                        bgr.pts = frame.pts
+                        bgr.time_base = frame.time_base
+                        dst.mux(vout.encode(bgr))
+
+                dst.mux(vout.encode(None))
+
+        finally:
+            src.close()
 
         return output_video
@@ -1,8 +1,7 @@
 import re
 import json
 from pathlib import Path
-from faster_whisper import WhisperModel
-from engine.config import HF_STORE
+from engine.whisper_runtime import load_whisper
 
 
 # ======================================================
@@ -113,19 +112,32 @@ def find_phrase_matches(words, h_words):
 
 
 # ======================================================
-# MAIN EXTRACTION (OFFLINE SAFE)
+# TRANSCRIPTION
 # ======================================================
 
-def extract_highlights(audio_path, highlights, debug_dir="debug"):
-    Path(debug_dir).mkdir(exist_ok=True)
+def collect_words(segments, offset=0.0):
+    """
+    Whisper segments → transcript dict:
+    {"words": [{"word", "start", "end"}], "audio_end": float}
+    Times are shifted by -offset.
+    """
+    words = []
+    audio_end = 0.0
+
+    for seg in segments:
+        audio_end = max(audio_end, seg.end - offset)
+        for w in seg.words:
+            words.append({
+                "word": normalize(w.word),
+                "start": round(w.start - offset, 2),
+                "end": round(w.end - offset, 2)
+            })
+
+    return {"words": words, "audio_end": audio_end}
 
-    model = WhisperModel(
-        "small",
-        device="cuda",
-        compute_type="float16",
-        download_root="/models/hf",
-        local_files_only=True,
-    )
+
+def transcribe(audio_path, config=None):
+    model = load_whisper("small", config=config)
 
     segments, _ = model.transcribe(
         audio_path,
@@ -135,20 +147,31 @@ def extract_highlights(audio_path, highlights, debug_dir="debug"):
         vad_filter=True
     )
 
-    # ------------------------------------------------------
-    # Collect words + audio duration
-    # ------------------------------------------------------
-    words = []
-    audio_end = 0.0
+    return collect_words(segments)
 
-    for seg in segments:
-        audio_end = max(audio_end, seg.end)
-        for w in seg.words:
-            words.append({
-                "word": normalize(w.word),
-                "start": round(w.start, 2),
-                "end": round(w.end, 2)
-            })
+
+# ======================================================
+# MAIN EXTRACTION (OFFLINE SAFE)
+# ======================================================
+
+def extract_highlights(
+    audio_path,
+    highlights,
+    debug_dir="debug",
+    config=None,
+    transcript=None,
+):
+    """
+    `transcript` (from collect_words / batch_transcriber) skips the
+    per-clip Whisper pass when the job already transcribed this audio.
+    """
+    Path(debug_dir).mkdir(exist_ok=True)
+
+    if transcript is None:
+        transcript = transcribe(audio_path, config=config)
+
+    words = transcript["words"]
+    audio_end = transcript["audio_end"]
 
     matched = []
     unmatched = []
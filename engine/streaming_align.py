@@ -0,0 +1,112 @@
+# engine/streaming_align.py
+
+import queue
+import threading
+from contextlib import nullcontext
+
+from engine.production_highlight_matcher import collect_words
+from engine.whisper_runtime import load_whisper
+
+WHISPER_SR = 16000
+
+
+def _to_16k(audio, sr):
+    import torch
+    import torchaudio
+
+    wav = torch.from_numpy(audio).float()
+    if sr != WHISPER_SR:
+        wav = torchaudio.functional.resample(wav, sr, WHISPER_SR)
+    return wav.numpy()
+
+
+def _align_chunk(model, chunk):
+    segments, _ = model.transcribe(
+        _to_16k(chunk["audio"], chunk["sr"]),
+        language="en",
+        task="transcribe",
+        word_timestamps=True,
+        vad_filter=True
+    )
+    # collect_words shifts by -offset → pass the negated chunk offset
+    return collect_words(segments, offset=-chunk["offset"])
+
+
+def synthesize_and_align(engine, text, config=None, slot=None):
+    """
+    Stream F5 sentence chunks from `engine.synthesize_stream` and run
+    Whisper on each chunk while the next one is being generated.
+    `slot` (e.g. jobs.gpu_slot) is held only around each chunk's
+    generation and each chunk's Whisper pass, so other GPU stages
+    (the per-frame blur) interleave with them.
+
+    Returns (wav_path, transcript); the transcript is in the same
+    shape as production_highlight_matcher.transcribe() and is timed
+    against the stitched WAV.
+    """
+    model = load_whisper("small", config=config)
+    slot = slot or nullcontext
+
+    chunks = []
+    pending = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    error = []
+
+    def put(item):
+        # bounded put that gives up once the consumer has stopped
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        stream = engine.synthesize_stream(text)
+        try:
+            while True:
+                with slot():
+                    chunk = next(stream, None)
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+                if not put(chunk):
+                    break
+        except Exception as e:
+            error.append(e)
+        finally:
+            stream.close()   # release the F5 generator and its tensors
+            put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    words = []
+    audio_end = 0.0
+
+    try:
+        while True:
+            chunk = pending.get()
+            if chunk is None:
+                break
+
+            with slot():
+                part = _align_chunk(model, chunk)
+            words.extend(part["words"])
+            audio_end = max(audio_end, part["audio_end"])
+
+    finally:
+        # on a Whisper error the producer must not block on a full queue
+        stop.set()
+        while True:
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                break
+        producer.join()
+
+    if error:
+        raise error[0]
+
+    return engine.stitch(chunks), {"words": words, "audio_end": audio_end}
@@ -3,8 +3,9 @@ import random
 
 
 class TextRenderer:
-    def __init__(self, config):
+    def __init__(self, config, rng=None):
         self.cfg = config
+        self.rng = rng or random
         self.font_path_desc = config["FONT_DESC"]
         self.font_path_number = config["FONT_NUMBER"]
         self.base_font_size = config["DESC_FONT_SIZE"]
@@ -12,14 +13,21 @@ class TextRenderer:
     # ======================================================
     # FONT SCALING (CRITICAL FIX)
     # ======================================================
-    def _get_fonts(self, video_width):
+    def font_size(self, video_width):
         """
         Scale font size based on video width.
         1920px is treated as baseline.
+        RENDER_SCALE < 1 (preview proxy) sizes for the full-res width
+        and shrinks the result, so the layout matches the final render.
         """
-        scale = video_width / 1920.0
+        render_scale = self.cfg.get("RENDER_SCALE", 1.0)
+        scale = video_width / render_scale / 1920.0
         size = int(self.base_font_size * scale)
         size = max(40, min(size, 96))  # clamp for safety
+        return max(1, int(size * render_scale))
+
+    def _get_fonts(self, video_width):
+        size = self.font_size(video_width)
 
         return {
             "desc": ImageFont.truetype(self.font_path_desc, size),
@@ -51,12 +59,9 @@ class TextRenderer:
         return lines
 
     # ======================================================
-    # MAIN HIGHLIGHT RENDER
+    # CASE RULES + LINE SPLIT (shared with AssRenderer)
     # ======================================================
-    def render_highlight(self, text, align="center", video_width=1920):
-        pad = self.cfg["PADDING"]
-        gap = self.cfg["LINE_GAP"]
-
+    def style_lines(self, text):
         text = text.strip()
 
         # CASE RULES
@@ -70,14 +75,23 @@ class TextRenderer:
                 if char_count <= 20:
                     styled_words.append(w.upper())
                 elif char_count <= 30:
-                    styled_words.append(random.choice([w.upper(), w.title()]))
+                    styled_words.append(self.rng.choice([w.upper(), w.title()]))
                 else:
-                    styled_words.append(random.choice([w.upper(), w.title(), w.lower()]))
+                    styled_words.append(self.rng.choice([w.upper(), w.title(), w.lower()]))
 
         styled_text = " ".join(styled_words)
 
         # SMART SPLIT
-        lines = self._smart_split(styled_text)
+        return self._smart_split(styled_text)
+
+    # ======================================================
+    # MAIN HIGHLIGHT RENDER
+    # ======================================================
+    def render_highlight(self, text, align="center", video_width=1920):
+        pad = self.cfg["PADDING"]
+        gap = self.cfg["LINE_GAP"]
+
+        lines = self.style_lines(text)
 
         # FONTS (VIDEO AWARE)
         fonts = self._get_fonts(video_width)
@@ -0,0 +1,310 @@
+# engine/tts_backends.py
+
+import threading
+import time
+from collections import deque
+
+# ======================================================
+# RATE LIMITING (process-wide)
+# ======================================================
+
+class SlidingWindow:
+    """
+    Thread-safe sliding-window quota, the way the API counts it: at
+    most `limit` units in any `window` seconds. acquire() blocks until
+    the units fit. Requests start a little after they are reserved, so
+    each one is counted for `window + margin` here.
+    """
+
+    def __init__(self, limit: float, window: float = 60.0, margin: float = 1.0):
+        self.limit = limit
+        self.span = window + margin
+        self.used = deque()   # (reserved at, units)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.used and now - self.used[0][0] >= self.span:
+            self.total -= self.used.popleft()[1]
+
+    def acquire(self, n: float = 1.0):
+        """
+        Take `n` units. More than `limit` is taken in limit-sized
+        parts, so a long script is still charged in full.
+        """
+        while n > 0:
+            part = min(n, self.limit)
+            self._acquire(part)
+            n -= part
+
+    def _acquire(self, n: float):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._expire(now)
+                if self.total + n <= self.limit:
+                    self.used.append((now, n))
+                    self.total += n
+                    return
+
+                # wait until enough of the oldest entries have aged out
+                freed, wait = self.total, 0.0
+                for at, units in self.used:
+                    freed -= units
+                    wait = at + self.span - now
+                    if freed + n <= self.limit:
+                        break
+
+            time.sleep(max(wait, 0.01))
+
+
+class ApiLimiter:
+    """
+    Matches an API plan: at most `concurrency` requests in flight and
+    `chars_per_minute` characters in any `window` seconds (None =
+    unlimited).
+    """
+
+    def __init__(self, concurrency: int, chars_per_minute=None, window=60.0):
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.chars = (
+            SlidingWindow(chars_per_minute, window)
+            if chars_per_minute else None
+        )
+
+    def __enter__(self):
+        self.slots.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.slots.release()
+
+    def reserve(self, text: str):
+        if self.chars:
+            self.chars.acquire(len(text))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(
+    name: str, concurrency: int, chars_per_minute=None, window=60.0
+) -> ApiLimiter:
+    """
+    One limiter per backend name for the whole process; the first
+    caller's limits win.
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = ApiLimiter(concurrency, chars_per_minute, window)
+        return _limiters[name]
+
+
+# ======================================================
+# BACKENDS
+# ======================================================
+
+class TTSUnavailable(RuntimeError):
+    """Backend throttled (429) or down (5xx / network)."""
+
+
+def is_unavailable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+
+    return (
+        isinstance(exc, (ConnectionError, TimeoutError, TTSUnavailable))
+        or type(exc).__module__.split(".")[0] in ("httpx", "httpcore")
+    )
+
+
+class ElevenLabsBackend:
+    name = "elevenlabs"
+
+    def __init__(self, voice_id, config):
+        from engine.elevenlabs_engine import ElevenLabsEngine
+
+        self.engine = ElevenLabsEngine(voice_id)
+        self.limiter = get_limiter(
+            self.name,
+            concurrency=config.get("ELEVEN_MAX_CONCURRENCY", 2),
+            chars_per_minute=config.get("ELEVEN_CHARS_PER_MINUTE"),
+            # quota window; only shortened for the fake server check
+            window=config.get("ELEVEN_RATE_WINDOW", 60.0),
+        )
+
+    def synthesize(self, text):
+        self.limiter.reserve(text)
+        with self.limiter:
+            return self.engine.synthesize(text)
+
+    def synthesize_pcm(self, text):
+        from engine.voice_audio import VoiceAudio
+
+        self.limiter.reserve(text)
+        with self.limiter:
+            samples, sr, path = self.engine.synthesize_pcm(text)
+        return VoiceAudio(samples, sr, path=path)
+
+
+_f5_engine = None
+_f5_lock = threading.Lock()
+
+
+class F5Backend:
+    """
+    Local F5 voice clone. The model is loaded once per process and
+    generation is serialized (one GPU model).
+    """
+    name = "f5"
+
+    def __init__(self, voice_id, config):
+        global _f5_engine
+        self.config = config
+
+        with _f5_lock:
+            if _f5_engine is None:
+                from engine.f5_engine import VoiceCloneEngine
+                _f5_engine = VoiceCloneEngine(
+                    batch_size=config.get("F5_BATCH_SIZE", 4)
+                )
+        self.engine = _f5_engine
+
+    def synthesize(self, text):
+        with _f5_lock:
+            return self.engine.synthesize(text)
+
+    def synthesize_many(self, texts):
+        """
+        One WAV per script; chunks of all scripts share batches.
+        """
+        with _f5_lock:
+            return self.engine.synthesize_many(texts)
+
+    def synthesize_aligned(self, text, slot=None):
+        from engine.streaming_align import synthesize_and_align
+
+        with _f5_lock:
+            return synthesize_and_align(
+                self.engine, text, config=self.config, slot=slot
+            )
+
+
+TTS_BACKENDS = {
+    "elevenlabs": ElevenLabsBackend,
+    "f5": F5Backend,
+}
+
+
+def register_backend(name: str, factory):
+    """
+    `factory(voice_id, config)` → object with synthesize(text) -> path
+    and optionally synthesize_pcm(text) -> VoiceAudio.
+    """
+    TTS_BACKENDS[name] = factory
+
+
+class FallbackTTS:
+    """
+    Primary backend, switching to `fallback` only when the primary
+    is throttled or down. The fallback is built lazily.
+    """
+
+    def __init__(self, primary, fallback_name, voice_id, config):
+        self.primary = primary
+        self.fallback_name = fallback_name
+        self.voice_id = voice_id
+        self.config = config
+        self.fallback = None
+
+        # optional paths (streaming alignment, batched TTS) exist only
+        # when the primary has them, so hasattr() checks still work
+        if hasattr(primary, "synthesize_aligned"):
+            self.synthesize_aligned = self._synthesize_aligned
+        if hasattr(primary, "synthesize_many"):
+            self.synthesize_many = self._synthesize_many
+
+    def _fallback(self):
+        if self.fallback is None:
+            self.fallback = TTS_BACKENDS[self.fallback_name](self.voice_id, self.config)
+        return self.fallback
+
+    def synthesize(self, text):
+        try:
+            return self.primary.synthesize(text)
+        except Exception as e:
+            if not is_unavailable(e):
+                raise
+            print(f"⚠️ {self.primary.name} unavailable ({e}), using {self.fallback_name}")
+            return self._fallback().synthesize(text)
+
+    def _synthesize_aligned(self, text, slot=None):
+        """
+        (audio_path, transcript). A fallback without streaming
+        alignment returns transcript None (batched Whisper fills it).
+        """
+        try:
+            return self.primary.synthesize_aligned(text, slot=slot)
+        except Exception as e:
+            if not is_unavailable(e):
+                raise
+            print(f"⚠️ {self.primary.name} unavailable ({e}), using {self.fallback_name}")
+            fallback = self._fallback()
+            if hasattr(fallback, "synthesize_aligned"):
+                return fallback.synthesize_aligned(text, slot=slot)
+            return fallback.synthesize(text), None
+
+    def _synthesize_many(self, texts):
+        try:
+            return self.primary.synthesize_many(texts)
+        except Exception as e:
+            if not is_unavailable(e):
+                raise
+            print(f"⚠️ {self.primary.name} unavailable ({e}), using {self.fallback_name}")
+            fallback = self._fallback()
+            if hasattr(fallback, "synthesize_many"):
+                return fallback.synthesize_many(texts)
+            return [fallback.synthesize(t) for t in texts]
+
+    def synthesize_pcm(self, text):
+        try:
+            return synthesize_voice(self.primary, text)
+        except Exception as e:
+            if not is_unavailable(e):
+                raise
+            print(f"⚠️ {self.primary.name} unavailable ({e}), using {self.fallback_name}")
+            return synthesize_voice(self._fallback(), text)
+
+
+def synthesize_voice(engine, text):
+    """
+    TTS → VoiceAudio, decoded once. Backends with synthesize_pcm()
+    hand over raw samples; the rest are decoded from their file.
+    """
+    if hasattr(engine, "synthesize_pcm"):
+        return engine.synthesize_pcm(text)
+
+    from engine.voice_audio import VoiceAudio
+    return VoiceAudio.from_file(engine.synthesize(text))
+
+
+def get_tts_engine(config: dict, voice_id: str):
+    """
+    Backend from config["TTS_BACKEND"] (default elevenlabs), wrapped
+    with config["TTS_FALLBACK"] when set.
+    """
+    name = config.get("TTS_BACKEND", "elevenlabs")
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+
+    engine = TTS_BACKENDS[name](voice_id, config)
+
+    fallback = config.get("TTS_FALLBACK")
+    if fallback and fallback != name:
+        if fallback not in TTS_BACKENDS:
+            raise ValueError(f"Unknown TTS fallback: {fallback}")
+        engine = FallbackTTS(engine, fallback, voice_id, config)
+
+    return engine
@@ -13,7 +13,7 @@ class VideoBuilder:
     # =====================================================
 
     def resolve_position(self, img_w, img_h, position):
-        margin = 60
+        margin = int(60 * self.cfg.get("RENDER_SCALE", 1.0))
 
         positions = {
             "top-left": (margin, margin),
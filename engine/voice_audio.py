@@ -0,0 +1,86 @@
+# engine/voice_audio.py
+#
+# The synthesized voice, decoded ONCE into a float32 mono buffer.
+# Whisper gets a 16 kHz view, the compositor reads the duration from
+# the sample count and ffmpeg is fed the raw PCM over stdin.
+
+import numpy as np
+
+WHISPER_SR = 16000
+RESAMPLE_BLOCK = 1 << 16
+
+
+def _resample(frames, rate):
+    """
+    av.AudioFrame iterable → float32 mono at `rate` (libswresample).
+    """
+    import av
+
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=rate)
+    parts = []
+
+    for frame in frames:
+        for out in resampler.resample(frame):
+            parts.append(out.to_ndarray().reshape(-1))
+    for out in resampler.resample(None):
+        parts.append(out.to_ndarray().reshape(-1))
+
+    if not parts:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(parts).astype(np.float32, copy=False)
+
+
+class VoiceAudio:
+    def __init__(self, samples, sr, path=None):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.sr = int(sr)
+        self.path = path   # file on disk (voice cache / debug names)
+        self._whisper = None
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Decode at the file's own sample rate, downmixed to mono.
+        """
+        import av
+
+        with av.open(path) as container:
+            stream = container.streams.audio[0]
+            sr = stream.codec_context.sample_rate
+            samples = _resample(container.decode(stream), sr)
+
+        return cls(samples, sr, path=path)
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sr
+
+    @property
+    def pcm(self):
+        """
+        (samples, sample_rate) — accepted as `audio` by ffmpeg_tools.
+        """
+        return self.samples, self.sr
+
+    def whisper(self):
+        """
+        16 kHz float32 view for faster-whisper (computed once).
+        """
+        if self._whisper is None:
+            if self.sr == WHISPER_SR:
+                self._whisper = self.samples
+            else:
+                import av
+
+                def frames():
+                    for i in range(0, len(self.samples), RESAMPLE_BLOCK):
+                        block = self.samples[i:i + RESAMPLE_BLOCK]
+                        frame = av.AudioFrame.from_ndarray(
+                            block.reshape(1, -1), format="flt", layout="mono"
+                        )
+                        frame.sample_rate = self.sr
+                        yield frame
+
+                self._whisper = _resample(frames(), WHISPER_SR)
+
+        return self._whisper
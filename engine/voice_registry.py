@@ -1,17 +1,144 @@
 import json
+import os
+import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime
 
-REGISTRY_PATH = Path("data/voice_registry.json")
+REGISTRY_PATH = Path(os.getenv("VOICE_REGISTRY_DB", "data/voice_registry.db"))
+SEED_PATH = Path("data/voice_registry.json")   # legacy / preloaded voices
 REGISTRY_PATH.parent.mkdir(exist_ok=True)
 
+_lock = threading.Lock()
+_cache = {"version": None, "data": {}}
+_ready = False
+
+
+# --------------------------------------------------
+# STORAGE (SQLite, one row per voice, indexed by name)
+# --------------------------------------------------
+
+def _connect():
+    conn = sqlite3.connect(REGISTRY_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    return conn
+
+
+def _init():
+    global _ready
+    if _ready:
+        return
+
+    with _lock:
+        if _ready:
+            return
+
+        conn = _connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS voices (
+                    name       TEXT PRIMARY KEY,
+                    voice_id   TEXT NOT NULL,
+                    source     TEXT,
+                    created_at TEXT
+                )
+                """
+            )
+            # bumped by every write; readers re-read only when it moved
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)"
+            )
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+
+            empty = conn.execute("SELECT COUNT(*) FROM voices").fetchone()[0] == 0
+
+            if empty and SEED_PATH.exists():
+                seed = json.loads(SEED_PATH.read_text())
+                conn.executemany(
+                    "INSERT OR IGNORE INTO voices VALUES (?, ?, ?, ?)",
+                    [
+                        (n, v["voice_id"], v.get("source"), v.get("created_at"))
+                        for n, v in seed.items()
+                    ]
+                )
+
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        _ready = True
+
+
+def _bump(conn):
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+
+def _rows(data):
+    return [
+        (n, v["voice_id"], v.get("source"), v.get("created_at"))
+        for n, v in data.items()
+    ]
+
+
+# --------------------------------------------------
+# PUBLIC API
+# --------------------------------------------------
+
 def load_registry():
-    if REGISTRY_PATH.exists():
-        return json.loads(REGISTRY_PATH.read_text())
-    return {}
+    """
+    {name: {"voice_id", "source", "created_at"}}, served from an
+    in-process cache until a write bumps the version row.
+    """
+    _init()
+
+    conn = _connect()
+    try:
+        conn.execute("BEGIN")
+        version = conn.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()[0]
+        if _cache["version"] == version:
+            conn.execute("COMMIT")
+            return _cache["data"]
+
+        rows = conn.execute(
+            "SELECT name, voice_id, source, created_at FROM voices ORDER BY rowid"
+        ).fetchall()
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    data = {}
+    for name, voice_id, source, created_at in rows:
+        entry = {"voice_id": voice_id, "created_at": created_at}
+        if source:
+            entry["source"] = source
+        data[name] = entry
+
+    _cache["version"] = version
+    _cache["data"] = data
+    return data
+
 
 def save_registry(data):
-    REGISTRY_PATH.write_text(json.dumps(data, indent=2))
+    """
+    Replace the whole registry with `data` (voices missing from it are
+    deleted), in one transaction.
+    """
+    _init()
+
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM voices")
+        conn.executemany("INSERT INTO voices VALUES (?, ?, ?, ?)", _rows(data))
+        _bump(conn)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
 
 def list_voices():
     return list(load_registry().keys())
@@ -20,9 +147,21 @@ def get_voice_id(name):
     return load_registry().get(name, {}).get("voice_id")
 
 def add_voice(name, voice_id):
-    data = load_registry()
-    data[name] = {
-        "voice_id": voice_id,
-        "created_at": datetime.now().isoformat()
-    }
-    save_registry(data)
+    """
+    Insert / overwrite one voice. A single-row upsert, so concurrent
+    adds from other sessions are not lost (no load → save round trip).
+    """
+    _init()
+
+    entry = {"voice_id": voice_id, "created_at": datetime.now().isoformat()}
+
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR REPLACE INTO voices VALUES (?, ?, ?, ?)", _rows({name: entry})
+        )
+        _bump(conn)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
@@ -1,4 +1,4 @@
-from faster_whisper import WhisperModel
+from engine.whisper_runtime import load_whisper
 
 def normalize(text):
     return (
@@ -10,12 +10,8 @@ def normalize(text):
     )
 
 class WhisperAligner:
-    def __init__(self, model="large-v3"):
-        self.model = WhisperModel(
-            model,
-            device="cuda",
-            compute_type="float16"
-        )
+    def __init__(self, model="large-v3", config=None):
+        self.model = load_whisper(model, config=config)
 
     def transcribe_words(self, audio_path):
         segments, info = self.model.transcribe(
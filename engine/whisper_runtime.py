@@ -0,0 +1,116 @@
+# engine/whisper_runtime.py
+
+import os
+from functools import lru_cache
+from pathlib import Path
+
+# Canonical faster-whisper model dir (Dockerfile bakes "small" into
+# /models/hf). Defined here, not in engine.config, which forces
+# HF_HUB_OFFLINE on import and would stop i.py / j.py downloading.
+WHISPER_DIR = Path(
+    os.getenv(
+        "WHISPER_MODEL_DIR",
+        "/models/hf" if Path("/models/hf").exists()
+        else Path(__file__).resolve().parents[1] / "hfstore"
+    )
+)
+
+# ======================================================
+# DEVICE / COMPUTE TYPE RESOLVER
+# ======================================================
+
+# Preference order per device, first supported wins
+COMPUTE_PREFERENCE = {
+    "cuda": ("float16", "int8_float16", "int8", "float32"),
+    "cpu": ("int8_float16", "int8", "float32"),
+}
+
+
+def _setting(config, key, default=None):
+    """
+    Config dict wins over environment, environment over default.
+    """
+    if config and config.get(key) is not None:
+        return config[key]
+    return os.getenv(key, default)
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def resolve_runtime(config=None) -> dict:
+    """
+    Pick device, compute type and CPU thread count for
+    faster-whisper from the hardware and optional overrides:
+
+      WHISPER_DEVICE        cuda | cpu | auto
+      WHISPER_COMPUTE_TYPE  any ctranslate2 compute type
+      WHISPER_THREADS       int (CPU only)
+    """
+    import ctranslate2
+
+    device = _setting(config, "WHISPER_DEVICE", "auto")
+    if device == "auto":
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
+    supported = ctranslate2.get_supported_compute_types(device)
+
+    compute_type = _setting(config, "WHISPER_COMPUTE_TYPE")
+    if not compute_type:
+        compute_type = next(
+            (c for c in COMPUTE_PREFERENCE[device] if c in supported),
+            "default"
+        )
+
+    threads = _setting(config, "WHISPER_THREADS")
+    if threads is None:
+        threads = _cpu_count() if device == "cpu" else 0
+
+    return {
+        "device": device,
+        "compute_type": compute_type,
+        "cpu_threads": int(threads),
+    }
+
+
+# ======================================================
+# MODEL LOADER (ONE INSTANCE PER SETTINGS)
+# ======================================================
+
+@lru_cache(maxsize=4)
+def _load(model_size, device, compute_type, cpu_threads, local_files_only):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(
+        model_size,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        download_root=str(WHISPER_DIR),
+        local_files_only=local_files_only,
+    )
+
+
+def load_whisper(model_size="small", config=None, local_files_only=None):
+    """
+    Shared WhisperModel for `model_size` on the resolved runtime,
+    always stored under WHISPER_DIR.
+    """
+    rt = resolve_runtime(config)
+
+    if local_files_only is None:
+        local_files_only = (
+            Path(WHISPER_DIR) / f"models--Systran--faster-whisper-{model_size}"
+        ).exists()
+
+    return _load(
+        model_size,
+        rt["device"],
+        rt["compute_type"],
+        rt["cpu_threads"],
+        bool(local_files_only),
+    )
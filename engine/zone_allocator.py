@@ -6,7 +6,8 @@ ZONES = [
 ]
 
 class ZoneAllocator:
-    def __init__(self):
+    def __init__(self, rng=None):
+        self.rng = rng or random
         self.active = []   # [(zone, start, end)]
         self.last_zone = None
 
@@ -30,7 +31,7 @@ class ZoneAllocator:
                 "bottom-left", "bottom-center", "bottom-right"
             ]
 
-        random.shuffle(candidates)
+        self.rng.shuffle(candidates)
 
         for zone in candidates:
             if zone == self.last_zone:
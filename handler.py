@@ -1,12 +1,14 @@
 import os
+import time
 import uuid
 import shutil
 import base64
 import requests
 import runpod
 
-from pipeline.process_clip import process_single_clip
+from pipeline.process_clip import process_clips
 from pipeline.combine_clips import combine_clips
+from pipeline.jobs import SQLiteJobQueue, set_gpu_concurrency, start_workers
 
 # --------------------------------------------------
 # CONSTANTS
@@ -19,6 +21,17 @@ CONFIG = {
     "PLATE_MODEL_PATH": "models/lp_key_point.pt",          
 }
 
+# Async mode: local job queue + worker threads in this process
+JOB_DB = os.getenv("JOB_DB", f"{TMP_ROOT}/bluvo_jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+GPU_CONCURRENCY = int(os.getenv("GPU_CONCURRENCY", "1"))
+
+# Async results stay on disk (only their path goes into the job DB)
+RESULTS_DIR = os.getenv("RESULTS_DIR", f"{TMP_ROOT}/bluvo_results")
+RESULT_MAX_AGE = float(os.getenv("RESULT_MAX_AGE_HOURS", "24")) * 3600
+
+_queue = None
+
 # --------------------------------------------------
 # HELPERS fine i will do it myself
 # --------------------------------------------------
@@ -37,6 +50,34 @@ def to_base64(path: str) -> str:
         return base64.b64encode(f.read()).decode("utf-8")
 
 
+def get_queue():
+    """
+    Job queue + workers, started on first async use.
+    """
+    global _queue
+    if _queue is None:
+        set_gpu_concurrency(GPU_CONCURRENCY)
+        _queue = SQLiteJobQueue(JOB_DB)
+        recovered = _queue.recover()
+        if recovered:
+            print(f"♻️ Recovered {recovered} interrupted job(s)")
+        start_workers(_queue, run_async_job, workers=JOB_WORKERS)
+    return _queue
+
+
+def prune_results():
+    if not os.path.isdir(RESULTS_DIR):
+        return
+    cutoff = time.time() - RESULT_MAX_AGE
+    for f in os.listdir(RESULTS_DIR):
+        path = os.path.join(RESULTS_DIR, f)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
 # --------------------------------------------------
 # HANDLER
 # --------------------------------------------------
@@ -54,18 +95,59 @@ def handler(event):
         }
       ]
     }
+
+    Async mode:
+      {"async": true, ...same fields}  → {"status": "queued", "job_id"}
+      {"job_id": "...", "since": 0}    → status, result, progress events
+      {"job_id": "...", "download": true} → finished video as base64
     """
 
     inp = event.get("input", {})
-    voice_id = inp.get("voice_id")
-    clips = inp.get("clips", [])
 
-    if not voice_id:
+    if inp.get("job_id"):
+        status = get_queue().get(inp["job_id"], since=inp.get("since", 0))
+        if status is None:
+            raise ValueError("Unknown job_id")
+
+        if inp.get("download"):
+            result = status["result"] or {}
+            if status["status"] != "done" or not os.path.exists(result.get("video_path", "")):
+                raise ValueError(f"No video for job {inp['job_id']} ({status['status']})")
+            return {**result, "video_base64": to_base64(result["video_path"])}
+
+        return status
+
+    if inp.get("async"):
+        validate(inp)
+        prune_results()
+        job_id = get_queue().submit(inp)
+        return {"status": "queued", "job_id": job_id}
+
+    return run_job(inp)
+
+
+def validate(inp):
+    if not inp.get("voice_id"):
         raise ValueError("voice_id is required")
 
-    if not clips:
+    if not inp.get("clips"):
         raise ValueError("At least one clip is required")
 
+
+def run_async_job(inp, progress=None):
+    """
+    Worker entry: the video is kept under RESULTS_DIR and the job row
+    stores its path, not the base64 payload.
+    """
+    return run_job(inp, progress=progress, keep_result=True)
+
+
+def run_job(inp, progress=None, keep_result=False):
+    validate(inp)
+
+    voice_id = inp.get("voice_id")
+    clips = inp.get("clips", [])
+
     job_id = uuid.uuid4().hex[:8]
 
     upload_dir = f"{TMP_ROOT}/uploads_{job_id}"
@@ -79,43 +161,65 @@ def handler(event):
     final_video = f"{output_dir}/final.mp4"
 
     try:
-        outputs = []
+        jobs = []
 
         # --------------------------------------------------
-        # PROCESS CLIPS
+        # DOWNLOAD
         # --------------------------------------------------
         for idx, clip in enumerate(clips, start=1):
+            if progress:
+                progress("download", 0.0, f"clip {idx}/{len(clips)}")
+
             raw_video = f"{upload_dir}/{idx}.mp4"
             out_video = f"{clips_dir}/{idx}.mp4"
 
             download_file(clip["video_url"], raw_video)
 
-            process_single_clip(
-                video_path=raw_video,
-                tts_script=clip["tts"],
-                highlights=clip["highlights"],
-                output_path=out_video,
-                config=CONFIG,
-                voice_id=voice_id
-            )
+            jobs.append({
+                "video_path": raw_video,
+                "tts_script": clip["tts"],
+                "highlights": clip["highlights"],
+                "output_path": out_video,
+            })
 
-            outputs.append(out_video)
+        # --------------------------------------------------
+        # PROCESS CLIPS (one batched Whisper pass per job)
+        # --------------------------------------------------
+        outputs = process_clips(
+            jobs, config=CONFIG, voice_id=voice_id, progress=progress
+        )
 
         # --------------------------------------------------
         # COMBINE (ONLY IF MULTIPLE)
         # --------------------------------------------------
         if len(outputs) > 1:
+            if progress:
+                progress("combine", 0.95)
+
             combine_clips(
                 clips_dir=clips_dir,
                 output_path=final_video,
                 logo_path=LOGO_PATH,
                 compress=True,
-                compression_crf=24
+                compression_crf=24,
+                parallel=CONFIG.get("COMBINE_PARALLEL", False),
+                segment_seconds=CONFIG.get("COMBINE_SEGMENT_SECONDS"),
+                output_mode=CONFIG.get("OUTPUT_MODE", "faststart")
             )
             result_path = final_video
         else:
             result_path = outputs[0]
 
+        if keep_result:
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            kept = f"{RESULTS_DIR}/{job_id}.mp4"
+            shutil.move(result_path, kept)
+            return {
+                "status": "success",
+                "clips_processed": len(outputs),
+                "video_path": kept
+            }
+
         # --------------------------------------------------
         # BASE64 RESPONSE
         # --------------------------------------------------
@@ -137,6 +241,8 @@ def handler(event):
 # --------------------------------------------------
 # START SERVERLESS
 # --------------------------------------------------
-runpod.serverless.start({
-    "handler": handler
-})
+# guarded: spawned combine workers re-import this module
+if __name__ == "__main__":
+    runpod.serverless.start({
+        "handler": handler
+    })
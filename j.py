@@ -1,10 +1,5 @@
-from faster_whisper import WhisperModel
-from engine.config import HF_STORE
+from engine.whisper_runtime import load_whisper, resolve_runtime
 
-model = WhisperModel(
-    "large-v3",
-    device="cuda",
-    compute_type="float16",
-)
+model = load_whisper("large-v3")
 
-print("Whisper loaded successfully")
+print("Whisper loaded successfully", resolve_runtime())
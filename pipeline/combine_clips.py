@@ -1,13 +1,19 @@
 import os
 import re
+import bisect
 import subprocess
-from moviepy.editor import (
-    VideoFileClip,
-    ImageClip,
-    CompositeVideoClip,
-    concatenate_videoclips
+import threading
+import cv2
+import numpy as np
+from PIL import Image
+from moviepy.editor import VideoClip, VideoFileClip
+
+from pipeline.ffmpeg_tools import (
+    concat_audio, concat_video, keyframe_flags, movflags, mux, probe_video
 )
 
+GOP_SECONDS = 2   # keyframe interval; fixed-length segments are multiples of it
+
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
@@ -17,29 +23,381 @@ def numeric_sort(filename):
     return int(m.group(1)) if m else 9999
 
 
-def compress_video(input_path: str, output_path: str, crf: int = 24):
+class Letterbox:
+    """
+    Fit frames of one clip into a target canvas (black bars).
+    Scale + offset are computed once; every frame is resized with
+    cv2 straight into a reused, preallocated canvas. `overlays` are
+    rects blended in place afterwards (LogoLayer.rects): their parts on
+    the bars are re-zeroed per frame, as the bars are never redrawn.
+    """
+
+    def __init__(self, src_w, src_h, target_w, target_h, overlays=()):
+        scale = min(target_w / src_w, target_h / src_h)
+
+        self.size = (target_w, target_h)
+        self.new_w = max(1, round(src_w * scale))
+        self.new_h = max(1, round(src_h * scale))
+        self.x = (target_w - self.new_w) // 2
+        self.y = (target_h - self.new_h) // 2
+
+        self.passthrough = (src_w, src_h) == (target_w, target_h)
+        self.interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        self.canvas = np.zeros((target_h, target_w, 3), dtype=np.uint8)
+        self.dirty = [] if self.passthrough else self._bars_under(overlays)
+
+    def _bars_under(self, rects):
+        """
+        (row slice, col slice) of every rect ∩ bar band.
+        """
+        tw, th = self.size
+        px1, py1 = self.x, self.y
+        px2, py2 = self.x + self.new_w, self.y + self.new_h
+        bands = (
+            (0, 0, tw, py1), (0, py2, tw, th),          # top, bottom
+            (0, py1, px1, py2), (px2, py1, tw, py2),    # left, right
+        )
+
+        out = []
+        for x1, y1, x2, y2 in rects:
+            for bx1, by1, bx2, by2 in bands:
+                ix1, iy1 = max(x1, bx1), max(y1, by1)
+                ix2, iy2 = min(x2, bx2), min(y2, by2)
+                if ix2 > ix1 and iy2 > iy1:
+                    out.append((slice(iy1, iy2), slice(ix1, ix2)))
+        return out
+
+    def __call__(self, frame):
+        if self.passthrough:
+            return frame
+
+        self.canvas[self.y:self.y + self.new_h, self.x:self.x + self.new_w] = cv2.resize(
+            frame, (self.new_w, self.new_h), interpolation=self.interp
+        )
+        for ys, xs in self.dirty:
+            self.canvas[ys, xs] = 0
+        return self.canvas
+
+
+class LogoLayer:
+    """
+    Top-right logo + centered watermark, merged ONCE into a single
+    premultiplied RGBA layer. Only the bounding rectangles are kept
+    and blended per frame, so watermarking is a few small copies.
+    """
+
+    def __init__(
+        self,
+        logo_path,
+        target_w,
+        target_h,
+        top_logo_scale,
+        watermark_scale,
+        watermark_opacity,
+        margin,
+    ):
+        logo = np.array(Image.open(logo_path).convert("RGBA"))
+        self.size = (target_w, target_h)
+
+        layer = np.zeros((target_h, target_w, 4), dtype=np.float32)
+        rects = []
+
+        def place(width, x, y, opacity):
+            h = max(1, round(logo.shape[0] * width / logo.shape[1]))
+            img = cv2.resize(logo, (width, h), interpolation=cv2.INTER_AREA)
+            img = img.astype(np.float32) / 255.0
+
+            a = img[:, :, 3:] * opacity
+            dst = layer[y:y + h, x:x + width]
+            dst[:, :, :3] = img[:, :, :3] * a + dst[:, :, :3] * (1 - a)
+            dst[:, :, 3:] = a + dst[:, :, 3:] * (1 - a)
+            rects.append([x, y, x + width, y + h])
+
+        top_w = int(target_w * top_logo_scale)
+        place(top_w, target_w - top_w - margin, margin, 1.0)
+
+        wm_w = int(target_w * watermark_scale)
+        wm_h = round(logo.shape[0] * wm_w / logo.shape[1])
+        place(wm_w, (target_w - wm_w) // 2, (target_h - wm_h) // 2, watermark_opacity)
+
+        self.layer = layer
+        self.patches = []
+        self.rects = self._merge(rects)
+
+        for x1, y1, x2, y2 in self.rects:
+            region = layer[y1:y2, x1:x2]
+            self.patches.append((
+                slice(y1, y2),
+                slice(x1, x2),
+                # premultiplied color * 255 and inverse alpha, both in 0..255
+                (region[:, :, :3] * 255 * 255 + 127).astype(np.uint16),
+                np.repeat(((1 - region[:, :, 3:]) * 255).astype(np.uint16), 3, axis=2),
+            ))
+
+    @staticmethod
+    def _merge(rects):
+        """
+        Overlapping rects become their union so no pixel blends twice.
+        """
+        merged = []
+        for r in rects:
+            for m in merged:
+                if not (r[2] <= m[0] or r[0] >= m[2] or r[3] <= m[1] or r[1] >= m[3]):
+                    m[:] = [min(m[0], r[0]), min(m[1], r[1]), max(m[2], r[2]), max(m[3], r[3])]
+                    break
+            else:
+                merged.append(list(r))
+        return merged
+
+    def __call__(self, frame):
+        """
+        Blend the patch rects in place. Over a reused Letterbox canvas
+        this is only correct when the box was built with
+        overlays=self.rects (bars under the patches re-zeroed).
+        """
+        if not frame.flags.writeable:
+            frame = frame.copy()   # reader's buffer (passthrough clips)
+
+        for ys, xs, color, inv_alpha in self.patches:
+            region = frame[ys, xs]
+            region[:] = (region * inv_alpha + color) // 255
+
+        return frame
+
+
+def compress_video(
+    input_path: str,
+    output_path: str,
+    crf: int = 24,
+    audio_path=None,
+    output_mode="faststart",
+):
     """
     Compress final video WITHOUT changing visuals.
     Typical:
       80–120MB → 20–35MB
+    Audio is stream-copied (from `audio_path` when given).
+    output_mode="fragmented" makes the file playable while it encodes.
     """
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", input_path,
+    cmd = ["ffmpeg", "-y", "-i", input_path]
+
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+
+    cmd += [
         "-c:v", "libx264",
         "-preset", "medium",        # 🔥 balanced speed/size
         "-crf", str(crf),
         "-pix_fmt", "yuv420p",
         "-profile:v", "high",
         "-level", "4.2",
-        "-movflags", "+faststart",
-        "-c:a", "aac",
-        "-b:a", "128k",
+        *keyframe_flags(output_mode),
+        *movflags(output_mode),
+        "-c:a", "copy",
         output_path
     ]
     subprocess.run(cmd, check=True)
 
 
+class StreamingConcat(VideoClip):
+    """
+    Letterboxed concatenation that keeps ONE clip reader open.
+    The next clip is opened in the background `prefetch` seconds
+    before the boundary and each clip is closed as soon as it ends,
+    so memory and file handles stay flat for any clip count.
+    Frames must be requested in time order (as write_videofile does).
+    """
+
+    def __init__(self, paths, target_w, target_h, prefetch=1.0, overlays=()):
+        info = [probe_video(p) for p in paths]
+
+        self.paths = paths
+        self.target = (target_w, target_h)
+        self.overlays = overlays
+        self.prefetch = prefetch
+        self.starts = [0.0]
+        for duration, _ in info:
+            self.starts.append(self.starts[-1] + duration)
+
+        self.idx = None
+        self.clip = None
+        self.box = None
+        self.next = None   # (idx, thread, holder)
+
+        VideoClip.__init__(self, make_frame=self._frame, duration=self.starts[-1])
+        self.fps = max(f for _, f in info)
+
+    def _open(self, idx):
+        clip = VideoFileClip(self.paths[idx], audio=False)
+        return clip, Letterbox(clip.w, clip.h, *self.target, overlays=self.overlays)
+
+    def _start_prefetch(self, idx):
+        holder = {}
+
+        def run():
+            holder["value"] = self._open(idx)
+
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        self.next = (idx, t, holder)
+
+    def _switch(self, idx):
+        if self.clip:
+            self.clip.close()
+            self.clip = None
+
+        if self.next and self.next[0] == idx:
+            _, t, holder = self.next
+            t.join()
+            self.next = None
+            self.clip, self.box = holder["value"]
+        else:
+            self._drop_prefetch()
+            self.clip, self.box = self._open(idx)
+
+        self.idx = idx
+
+    def _drop_prefetch(self):
+        if self.next:
+            _, t, holder = self.next
+            t.join()
+            if "value" in holder:
+                holder["value"][0].close()
+            self.next = None
+
+    def _frame(self, t):
+        idx = min(bisect.bisect_right(self.starts, t) - 1, len(self.paths) - 1)
+        if idx != self.idx:
+            self._switch(idx)
+
+        local = t - self.starts[idx]
+        end = self.starts[idx + 1]
+
+        if (
+            idx + 1 < len(self.paths)
+            and self.next is None
+            and end - t <= self.prefetch
+        ):
+            self._start_prefetch(idx + 1)
+
+        local = min(local, self.clip.duration - 1.0 / max(self.clip.fps, 1))
+        return self.box(self.clip.get_frame(local))
+
+    def close(self):
+        self._drop_prefetch()
+        if self.clip:
+            self.clip.close()
+            self.clip = None
+        self.idx = None
+
+
+def master_params(fps):
+    """
+    Encoder settings for the high-quality master. Serial and
+    segment-parallel writes share them so segments concat cleanly.
+    """
+    return [
+        "-pix_fmt", "yuv420p",
+        "-profile:v", "high",
+        "-level", "4.2",
+        "-crf", "19",              # visually lossless
+        "-g", str(max(1, round(fps * GOP_SECONDS))),
+    ]
+
+
+# --------------------------------------------------
+# Segment-parallel master
+# --------------------------------------------------
+
+_worker_logos = {}
+
+
+def _encode_segment(task):
+    """
+    Process-pool worker: letterbox + logos + encode one segment.
+    """
+    path, start, end, out, fps, logo_args, threads = task
+
+    if logo_args not in _worker_logos:
+        _worker_logos[logo_args] = LogoLayer(*logo_args)
+    logos = _worker_logos[logo_args]
+    target_w, target_h = logos.size
+
+    clip = VideoFileClip(path, audio=False)
+    try:
+        seg = clip.subclip(start, min(end, clip.duration))
+        box = Letterbox(clip.w, clip.h, target_w, target_h, overlays=logos.rects)
+        if not box.passthrough:
+            seg = seg.fl_image(box)
+
+        seg.fl_image(logos).write_videofile(
+            out,
+            codec="libx264",
+            audio=False,
+            fps=fps,
+            preset="fast",
+            ffmpeg_params=master_params(fps),
+            threads=threads,
+            logger=None
+        )
+    finally:
+        clip.close()
+
+    return out
+
+
+def write_master_parallel(paths, output_path, logo_args, segment_seconds=None, workers=None):
+    """
+    Split the timeline at clip boundaries (and every
+    `segment_seconds`, rounded to whole GOPs), encode segments in a
+    process pool with identical settings, then concat without
+    re-encoding. Workers are spawned, not forked: this runs inside
+    threaded job workers, and a fork would copy their held locks.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    info = [probe_video(p) for p in paths]
+    fps = max(f for _, f in info)
+
+    step = None
+    if segment_seconds:
+        step = max(1, round(segment_seconds / GOP_SECONDS)) * GOP_SECONDS
+
+    tasks = []
+    for path, (duration, _) in zip(paths, info):
+        cuts = [0.0]
+        if step:
+            cuts += [t for t in range(step, int(duration), step) if duration - t > 0.5]
+        cuts.append(duration)
+
+        for start, end in zip(cuts, cuts[1:]):
+            seg = output_path.replace(".mp4", f"_seg{len(tasks):04d}.mp4")
+            tasks.append([path, start, end, seg, fps, logo_args])
+
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, len(tasks))
+    threads = max(1, cores // workers)
+
+    for t in tasks:
+        t.append(threads)
+
+    segments = [t[3] for t in tasks]
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            list(pool.map(_encode_segment, [tuple(t) for t in tasks]))
+
+        concat_video(segments, output_path)
+    finally:
+        for s in segments:
+            if os.path.exists(s):
+                os.remove(s)
+
+    return output_path
+
+
 # --------------------------------------------------
 # Main combiner
 # --------------------------------------------------
@@ -55,7 +413,11 @@ def combine_clips(
     watermark_opacity=0.5,
     margin=40,
     compress=True,
-    compression_crf=24
+    compression_crf=24,
+    parallel=False,
+    segment_seconds=None,
+    workers=None,
+    output_mode="faststart",
 ):
     files = sorted(
         [f for f in os.listdir(clips_dir) if f.endswith(".mp4")],
@@ -67,70 +429,66 @@ def combine_clips(
 
     processed = []
     final = None
-    target_ratio = target_w / target_h
+    temp_master = temp_audio = None
+
+    paths = [os.path.join(clips_dir, f) for f in files]
+    logo_args = (
+        logo_path,
+        target_w,
+        target_h,
+        top_logo_scale,
+        watermark_scale,
+        watermark_opacity,
+        margin,
+    )
 
     try:
         # ------------------------------------------
-        # Resize + letterbox
-        # ------------------------------------------
-        for f in files:
-            clip = VideoFileClip(os.path.join(clips_dir, f))
-
-            scale = (
-                target_w / clip.w
-                if (clip.w / clip.h) > target_ratio
-                else target_h / clip.h
-            )
-
-            clip = clip.resize(scale).on_color(
-                size=(target_w, target_h),
-                color=(0, 0, 0),
-                pos=("center", "center")
-            )
-
-            processed.append(clip)
-
-        base = concatenate_videoclips(processed, method="compose")
-
-        # ------------------------------------------
-        # Logos
+        # Audio: clips' AAC joined at packet level
         # ------------------------------------------
-        logo = ImageClip(logo_path).set_duration(base.duration)
+        temp_audio = output_path.replace(".mp4", "_audio.m4a")
+        concat_audio(paths, temp_audio)
 
-        top_logo = (
-            logo.resize(width=int(target_w * top_logo_scale))
-            .set_position((target_w - int(target_w * top_logo_scale) - margin, margin))
-        )
-
-        watermark = (
-            logo.resize(width=int(target_w * watermark_scale))
-            .set_opacity(watermark_opacity)
-            .set_position("center")
-        )
-
-        final = CompositeVideoClip([base, top_logo, watermark])
-
-        # ------------------------------------------
-        # Write master (high quality)
-        # ------------------------------------------
         temp_master = output_path.replace(".mp4", "_master.mp4")
 
-        final.write_videofile(
-            temp_master,
-            codec="libx264",
-            audio_codec="aac",
-            fps=base.fps,
-            preset="fast",
-            ffmpeg_params=[
-                "-pix_fmt", "yuv420p",
-                "-profile:v", "high",
-                "-level", "4.2",
-                "-crf", "19",              # visually lossless
-                "-movflags", "+faststart"
-            ],
-            threads=4,
-            logger=None
-        )
+        if parallel:
+            # ------------------------------------------
+            # Write master across cores (video only)
+            # ------------------------------------------
+            write_master_parallel(
+                paths,
+                temp_master,
+                logo_args,
+                segment_seconds=segment_seconds,
+                workers=workers
+            )
+        else:
+            # ------------------------------------------
+            # Logos (one precomposited layer)
+            # ------------------------------------------
+            logos = LogoLayer(*logo_args)
+
+            # ------------------------------------------
+            # Resize + letterbox, one open clip at a time
+            # ------------------------------------------
+            base = StreamingConcat(paths, target_w, target_h, overlays=logos.rects)
+            processed.append(base)
+
+            final = base.fl_image(logos).without_audio()
+
+            # ------------------------------------------
+            # Write master (high quality, video only)
+            # ------------------------------------------
+            final.write_videofile(
+                temp_master,
+                codec="libx264",
+                audio=False,
+                fps=base.fps,
+                preset="fast",
+                ffmpeg_params=master_params(base.fps),
+                threads=4,
+                logger=None
+            )
 
         # ------------------------------------------
         # Compress
@@ -139,11 +497,12 @@ def combine_clips(
             compress_video(
                 temp_master,
                 output_path,
-                crf=compression_crf
+                crf=compression_crf,
+                audio_path=temp_audio,
+                output_mode=output_mode
             )
-            os.remove(temp_master)
         else:
-            os.rename(temp_master, output_path)
+            mux(temp_master, temp_audio, output_path, output_mode=output_mode)
 
         return output_path
 
@@ -163,6 +522,10 @@ def combine_clips(
         except:
             pass
 
+        for f in (temp_master, temp_audio):
+            if f and os.path.exists(f):
+                os.remove(f)
+
 
 # def run_combine_from_folder():
 #     """
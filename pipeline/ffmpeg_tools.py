@@ -0,0 +1,384 @@
+import json
+import os
+import subprocess
+import tempfile
+
+# --------------------------------------------------
+# MP4 layout
+#   faststart:  moov moved to the front after encoding (one rewrite)
+#   fragmented: empty moov + moof fragments written as encoding runs,
+#               playable while the file is still growing
+# --------------------------------------------------
+
+OUTPUT_MODES = {
+    "faststart": "+faststart",
+    "fragmented": "+frag_keyframe+empty_moov+default_base_moof",
+}
+FRAGMENT_SECONDS = 2
+
+
+def movflags(mode="faststart"):
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"❌ Unknown output mode: {mode}")
+    return ["-movflags", OUTPUT_MODES[mode]]
+
+
+def keyframe_flags(mode="faststart"):
+    """
+    Encoder flags for `mode`: fragments start on keyframes, so force
+    one every FRAGMENT_SECONDS to keep the first fragment short.
+    """
+    if mode != "fragmented":
+        return []
+    return ["-force_key_frames", f"expr:gte(t,n_forced*{FRAGMENT_SECONDS})"]
+
+# --------------------------------------------------
+# Audio inputs: a file path, or (float32 mono samples, sample_rate)
+# piped over stdin so an already-decoded voice is not decoded again
+# --------------------------------------------------
+
+def _audio_input(audio):
+    """
+    → (ffmpeg input args, stdin bytes or None)
+    """
+    if isinstance(audio, (str, os.PathLike)):
+        return ["-i", str(audio)], None
+
+    samples, sr = audio
+    return (
+        ["-f", "f32le", "-ar", str(sr), "-ac", "1", "-i", "pipe:0"],
+        samples.astype("<f4", copy=False).tobytes()
+    )
+
+
+# --------------------------------------------------
+# Probing
+# --------------------------------------------------
+
+def probe_audio(path: str):
+    """
+    (codec, sample_rate, channels) of the first audio stream,
+    or None when the file has no audio.
+    """
+    out = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "a:0",
+            "-show_entries", "stream=codec_name,sample_rate,channels",
+            "-of", "json",
+            path
+        ],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+
+    streams = json.loads(out).get("streams", [])
+    if not streams:
+        return None
+
+    s = streams[0]
+    return s["codec_name"], int(s["sample_rate"]), int(s["channels"])
+
+
+def probe_video(path: str):
+    """
+    (duration_seconds, fps) of the first video stream. fps is the
+    average rate; r_frame_rate (the lowest rate every timestamp fits,
+    often 60+ for a VFR phone clip shot at ~30) only when it is unknown.
+    """
+    out = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=avg_frame_rate,r_frame_rate:format=duration",
+            "-of", "json",
+            path
+        ],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+
+    info = json.loads(out)
+    stream = info["streams"][0]
+
+    num, den = stream.get("avg_frame_rate", "0/0").split("/")
+    if not float(num) or not float(den):
+        num, den = stream["r_frame_rate"].split("/")
+
+    return float(info["format"]["duration"]), float(num) / float(den)
+
+
+def probe_size(path: str):
+    """
+    Displayed (width, height) of the first video stream: phone clips
+    stored landscape with a 90° rotation come back as portrait, the
+    way ffmpeg autorotates them.
+    """
+    out = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries",
+            "stream=width,height:stream_tags=rotate:stream_side_data=rotation",
+            "-of", "json",
+            path
+        ],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+
+    s = json.loads(out)["streams"][0]
+    w, h = int(s["width"]), int(s["height"])
+
+    rotation = s.get("tags", {}).get("rotate", 0)
+    for side in s.get("side_data_list", []):
+        rotation = side.get("rotation", rotation)
+
+    if abs(int(float(rotation))) % 180 == 90:
+        w, h = h, w
+    return w, h
+
+
+# --------------------------------------------------
+# Scaling / frame rate (video only)
+# --------------------------------------------------
+
+def transcode_video(
+    path: str,
+    output_path: str,
+    height=None,
+    fps=None,
+    duration=None,
+    preset="ultrafast",
+    crf=18,
+    start=None,
+):
+    """
+    Video-only re-encode at `height` (aspect kept, even width) and/or
+    `fps`. Audio is dropped; the voice track replaces it downstream.
+    Frame rate changes keep the source frame nearest to each output
+    timestamp (drop / repeat, no blending); it runs before scaling
+    so dropped frames are never scaled. `start` / `duration` keep only
+    that part of the source (frame-accurate: the cut is re-encoded).
+    """
+    filters = []
+    if fps:
+        filters.append(f"fps={fps}:round=near")
+    if height:
+        filters.append(f"scale=-2:{int(height)}:flags=area")
+
+    cmd = ["ffmpeg", "-y", "-v", "error"]
+    if start:
+        cmd += ["-ss", f"{start:.3f}"]
+
+    cmd += ["-i", path, "-map", "0:v:0", "-an"]
+    if duration:
+        cmd += ["-t", f"{duration:.3f}"]
+    if filters:
+        cmd += ["-vf", ",".join(filters)]
+
+    cmd += [
+        "-c:v", "libx264",
+        "-preset", preset,
+        "-crf", str(crf),
+        "-pix_fmt", "yuv420p",
+        output_path
+    ]
+    subprocess.run(cmd, check=True)
+    return output_path
+
+
+# --------------------------------------------------
+# Muxing / concatenation (no video re-encode)
+# --------------------------------------------------
+
+def _concat_list(paths):
+    fd, list_file = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w") as f:
+        for p in paths:
+            f.write(f"file '{os.path.abspath(p)}'\n")
+    return list_file
+
+
+def concat_video(paths: list[str], output_path: str):
+    """
+    Join identically-encoded segments with the concat demuxer,
+    stream copy only.
+    """
+    list_file = _concat_list(paths)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-v", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", list_file,
+                "-map", "0:v",
+                "-c", "copy",
+                output_path
+            ],
+            check=True
+        )
+    finally:
+        os.remove(list_file)
+
+    return output_path
+
+
+def mux(
+    video_path: str,
+    audio_path: str,
+    output_path: str,
+    audio_codec="copy",
+    output_mode="faststart",
+    loop=False,
+):
+    """
+    Video stream from `video_path` + first audio stream of
+    `audio_path` (path or PCM, see _audio_input). Video is always
+    stream-copied; audio is copied unless `audio_codec` says otherwise
+    (e.g. "aac" for the voice, its one and only encode). With `loop`
+    the video repeats until the audio ends.
+    """
+    audio_args, stdin = _audio_input(audio_path)
+    cmd = ["ffmpeg", "-y", "-v", "error"]
+    if loop:
+        cmd += ["-stream_loop", "-1"]
+
+    cmd += [
+        "-i", video_path,
+        *audio_args,
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-c:v", "copy",
+        "-c:a", audio_codec,
+    ]
+    if audio_codec == "aac":
+        cmd += ["-b:a", "192k"]
+
+    cmd += ["-shortest", *movflags(output_mode), output_path]
+    subprocess.run(cmd, input=stdin, check=True)
+    return output_path
+
+
+def encode_audio(audio, output_path: str):
+    """
+    First audio stream (path or PCM) → AAC (.m4a), ready to be
+    stream-copied.
+    """
+    audio_args, stdin = _audio_input(audio)
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            *audio_args,
+            "-map", "0:a:0",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            output_path
+        ],
+        input=stdin,
+        check=True
+    )
+    return output_path
+
+
+def concat_audio(paths: list[str], output_path: str):
+    """
+    Join the audio tracks of `paths` in order.
+    Packet-level concat (no re-encode) when every track has the same
+    codec / rate / channels; otherwise a single AAC encode.
+    """
+    params = {probe_audio(p) for p in paths}
+
+    if len(params) == 1 and None not in params:
+        list_file = _concat_list(paths)
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-y", "-v", "error",
+                    "-f", "concat", "-safe", "0",
+                    "-i", list_file,
+                    "-map", "0:a",
+                    "-c", "copy",
+                    output_path
+                ],
+                check=True
+            )
+        finally:
+            os.remove(list_file)
+
+        return output_path
+
+    # formats differ → decode all, encode once
+    cmd = ["ffmpeg", "-y", "-v", "error"]
+    for p in paths:
+        cmd += ["-i", p]
+
+    inputs = "".join(f"[{i}:a:0]" for i in range(len(paths)))
+    cmd += [
+        "-filter_complex", f"{inputs}concat=n={len(paths)}:v=0:a=1[a]",
+        "-map", "[a]",
+        "-c:a", "aac",
+        "-b:a", "192k",
+        output_path
+    ]
+    subprocess.run(cmd, check=True)
+    return output_path
+
+
+# --------------------------------------------------
+# Subtitle burn-in (libass)
+# --------------------------------------------------
+
+def _filter_path(path: str) -> str:
+    # filtergraph escaping for paths inside `ass=...`
+    return (
+        os.path.abspath(path)
+        .replace("\\", "\\\\")
+        .replace(":", "\\:")
+        .replace("'", "\\'")
+    )
+
+
+def burn_in(
+    video_path: str,
+    audio,
+    ass_path: str,
+    output_path: str,
+    loop=True,
+    audio_codec="aac",
+    fonts_dir="fonts",
+    crf=23,
+    output_mode="faststart",
+):
+    """
+    One encode: (looped) video + voice with the ASS script burned in
+    by libass. Output length follows the voice (path or PCM).
+    """
+    audio_args, stdin = _audio_input(audio)
+
+    cmd = ["ffmpeg", "-y", "-v", "error"]
+    if loop:
+        cmd += ["-stream_loop", "-1"]
+
+    cmd += [
+        "-i", video_path,
+        *audio_args,
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-vf", f"ass={_filter_path(ass_path)}:fontsdir={_filter_path(fonts_dir)}",
+        "-c:v", "libx264",
+        "-preset", "ultrafast",
+        "-crf", str(crf),
+        "-pix_fmt", "yuv420p",
+        *keyframe_flags(output_mode),
+        "-c:a", audio_codec,
+    ]
+    if audio_codec == "aac":
+        cmd += ["-b:a", "192k"]
+
+    cmd += ["-shortest", *movflags(output_mode), output_path]
+    subprocess.run(cmd, input=stdin, check=True)
+    return output_path
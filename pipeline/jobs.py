@@ -0,0 +1,343 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+# --------------------------------------------------
+# GPU concurrency (process-wide)
+# --------------------------------------------------
+
+class FairSemaphore:
+    """
+    Semaphore that hands a released slot to the longest waiter (FIFO).
+    A stage taking the slot per frame (the plate blur) would otherwise
+    re-acquire it before a waiting Whisper pass ever wakes up.
+    """
+
+    def __init__(self, n: int):
+        self.free = n
+        self.lock = threading.Lock()
+        self.waiters = deque()
+
+    def acquire(self):
+        with self.lock:
+            if self.free and not self.waiters:
+                self.free -= 1
+                return
+            ready = threading.Event()
+            self.waiters.append(ready)
+        ready.wait()
+
+    def release(self):
+        with self.lock:
+            if self.waiters:
+                self.waiters.popleft().set()   # slot passes straight on
+            else:
+                self.free += 1
+
+
+_gpu = {"sem": FairSemaphore(1), "limit": 1}
+_gpu_lock = threading.Lock()
+
+
+def set_gpu_concurrency(n: int):
+    """
+    Max concurrent GPU stages (YOLO blur, Whisper) in this process.
+    Call before workers start.
+    """
+    with _gpu_lock:
+        _gpu["sem"] = FairSemaphore(max(1, n))
+        _gpu["limit"] = max(1, n)
+
+
+class gpu_slot:
+    """
+    `with gpu_slot(): ...` around any GPU-bound stage.
+    """
+
+    def __enter__(self):
+        self.sem = _gpu["sem"]
+        self.sem.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.sem.release()
+
+
+# --------------------------------------------------
+# Queues
+# --------------------------------------------------
+
+class SQLiteJobQueue:
+    """
+    Local durable queue. Jobs: queued → running → done | failed.
+    Per-stage progress events are appended for clients to poll.
+    """
+
+    def __init__(self, path="/tmp/bluvo_jobs.db"):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id       TEXT PRIMARY KEY,
+                    status   TEXT NOT NULL,
+                    payload  TEXT NOT NULL,
+                    result   TEXT,
+                    error    TEXT,
+                    created  REAL NOT NULL,
+                    updated  REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+                CREATE TABLE IF NOT EXISTS events (
+                    seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id   TEXT NOT NULL,
+                    ts       REAL NOT NULL,
+                    stage    TEXT NOT NULL,
+                    progress REAL,
+                    message  TEXT
+                );
+                CREATE INDEX IF NOT EXISTS events_job ON events (job_id, seq);
+                """
+            )
+        finally:
+            conn.close()
+
+    def recover(self, max_attempts=2) -> int:
+        """
+        Jobs left 'running' by a crashed / restarted process: requeued
+        until they have started `max_attempts` times, then failed.
+        Call once at startup, before workers, by the only process
+        working this database. Returns the number of jobs touched.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, (SELECT COUNT(*) FROM events e "
+                "            WHERE e.job_id = jobs.id AND e.stage = 'started') "
+                "FROM jobs WHERE status = 'running'"
+            ).fetchall()
+
+            now = time.time()
+            for job_id, attempts in rows:
+                if attempts < max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', updated = ? WHERE id = ?",
+                        (now, job_id)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, updated = ? "
+                        "WHERE id = ?",
+                        (f"interrupted {attempts} times (worker restarted)", now, job_id)
+                    )
+                conn.execute(
+                    "INSERT INTO events (job_id, ts, stage, progress, message) "
+                    "VALUES (?, ?, 'interrupted', NULL, ?)",
+                    (job_id, now, f"attempt {attempts}")
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        return len(rows)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+
+    def submit(self, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs VALUES (?, 'queued', ?, NULL, NULL, ?, ?)",
+                (job_id, json.dumps(payload), now, now)
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def claim(self):
+        """
+        Atomically take the oldest queued job → (job_id, payload) or None.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE status = 'queued' "
+                "ORDER BY created LIMIT 1"
+            ).fetchone()
+
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', updated = ? WHERE id = ?",
+                    (time.time(), row[0])
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        return (row[0], json.loads(row[1])) if row else None
+
+    def finish(self, job_id, result=None, error=None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? "
+                "WHERE id = ?",
+                (
+                    "failed" if error else "done",
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id
+                )
+            )
+        finally:
+            conn.close()
+
+    def event(self, job_id, stage, progress=None, message=None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO events (job_id, ts, stage, progress, message) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, time.time(), stage, progress, message)
+            )
+        finally:
+            conn.close()
+
+    def get(self, job_id, since=0):
+        """
+        Job status plus events with seq > `since` (for incremental polling).
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            events = conn.execute(
+                "SELECT seq, ts, stage, progress, message FROM events "
+                "WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, since)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        if not row:
+            return None
+
+        return {
+            "job_id": job_id,
+            "status": row[0],
+            "result": json.loads(row[1]) if row[1] else None,
+            "error": row[2],
+            "events": [
+                dict(zip(("seq", "ts", "stage", "progress", "message"), e))
+                for e in events
+            ],
+        }
+
+
+class MemoryJobQueue:
+    """
+    In-process stand-in with the same interface (tests / single process).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.order = []
+        self.events = []
+
+    def submit(self, payload):
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {"status": "queued", "payload": payload,
+                                 "result": None, "error": None}
+            self.order.append(job_id)
+        return job_id
+
+    def claim(self):
+        with self.lock:
+            for job_id in self.order:
+                job = self.jobs[job_id]
+                if job["status"] == "queued":
+                    job["status"] = "running"
+                    return job_id, job["payload"]
+        return None
+
+    def finish(self, job_id, result=None, error=None):
+        with self.lock:
+            job = self.jobs[job_id]
+            job.update(status="failed" if error else "done", result=result, error=error)
+
+    def event(self, job_id, stage, progress=None, message=None):
+        with self.lock:
+            self.events.append({
+                "seq": len(self.events) + 1, "job_id": job_id, "ts": time.time(),
+                "stage": stage, "progress": progress, "message": message
+            })
+
+    def get(self, job_id, since=0):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            return {
+                "job_id": job_id,
+                "status": job["status"],
+                "result": job["result"],
+                "error": job["error"],
+                "events": [
+                    {k: e[k] for k in ("seq", "ts", "stage", "progress", "message")}
+                    for e in self.events
+                    if e["job_id"] == job_id and e["seq"] > since
+                ],
+            }
+
+
+# --------------------------------------------------
+# Workers
+# --------------------------------------------------
+
+def start_workers(queue, run_job, workers=2, poll_interval=0.5):
+    """
+    Daemon threads pulling jobs from `queue` and calling
+    run_job(payload, progress). Several jobs overlap; GPU stages are
+    capped by gpu_slot. Returns the threads.
+    """
+
+    def loop():
+        while True:
+            claimed = queue.claim()
+            if not claimed:
+                time.sleep(poll_interval)
+                continue
+
+            job_id, payload = claimed
+
+            def progress(stage, value=None, message=None):
+                queue.event(job_id, stage, value, message)
+
+            try:
+                progress("started", 0.0)
+                result = run_job(payload, progress=progress)
+                progress("done", 1.0)
+                queue.finish(job_id, result=result)
+            except Exception as e:
+                progress("failed", None, str(e))
+                queue.finish(job_id, error=str(e))
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    return threads
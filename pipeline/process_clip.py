@@ -1,73 +1,370 @@
 import os
-from moviepy.editor import VideoFileClip, AudioFileClip
+import random
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from moviepy.editor import VideoFileClip
 
-from engine.elevenlabs_engine import ElevenLabsEngine
+from engine.tts_backends import get_tts_engine, synthesize_voice
+from engine.voice_audio import VoiceAudio
 from engine.highlight_engine import HighlightEngine
 from engine.text_renderer import TextRenderer
 from engine.video_builder import VideoBuilder
 from engine.plate_processor import PlateBlurProcessor
 from engine.zone_allocator import ZoneAllocator
 from engine.style_engine import StyleEngine
+from engine.base_cache import BaseClipCache
+from engine.ass_renderer import AssRenderer
+from pipeline.ffmpeg_tools import (
+    burn_in, concat_video, encode_audio, keyframe_flags, movflags, mux,
+    probe_size, probe_video, transcode_video
+)
+from pipeline.jobs import gpu_slot
 
+# Delivery frame size (combine_clips letterboxes into it) and rate
+DELIVERY_SIZE = (1920, 1080)
+DELIVERY_FPS = 30
 
-def process_single_clip(
+# Voice length guess for blurring while TTS runs (≈150 wpm), padded
+VOICE_WORDS_PER_SECOND = 2.5
+VOICE_SPAN_MARGIN = 1.25
+
+# Preview proxies: small, low frame rate, fastest settings
+PREVIEW_HEIGHT = 540
+PREVIEW_FPS = 15
+
+
+def ingest_height(src_w: int, src_h: int, config: dict) -> int:
+    """
+    Height the source is scaled to at ingest: fit inside
+    config["INGEST_SIZE"] (default DELIVERY_SIZE, None = keep), never
+    upscaled. Every later stage works at this size.
+    """
+    box = config.get("INGEST_SIZE", DELIVERY_SIZE)
+    if not box:
+        return src_h
+
+    box_w, box_h = box
+    fit = min(src_h, box_h, src_h * box_w / src_w)
+    return max(2, int(fit) // 2 * 2)
+
+
+def ingest_fps(src_fps: float, config: dict):
+    """
+    Frame rate the source is converted to at ingest, or None to keep
+    it. config["INGEST_FPS"] (default DELIVERY_FPS, None = keep): every
+    clip then runs at one known rate, so a 60 fps source does half
+    the detection / compositing / encode work and combine_clips never
+    resamples mixed rates. The NTSC variant of the target (29.97 for
+    30, 59.94 for 60) counts as a match: retiming it would only drop
+    one frame in a thousand at the cost of a full re-encode.
+    """
+    target = config.get("INGEST_FPS", DELIVERY_FPS)
+    if not target:
+        return None
+    if any(abs(src_fps - r) < 0.01 for r in (target, target * 1000 / 1001)):
+        return None
+    return target
+
+
+def estimate_voice_seconds(text: str) -> float:
+    """
+    Generous upper guess of the spoken length of `text`.
+    """
+    words = len(text.split())
+    return words / VOICE_WORDS_PER_SECOND * VOICE_SPAN_MARGIN + 1.0
+
+
+def preview_config(config: dict, height=PREVIEW_HEIGHT, fps=PREVIEW_FPS) -> dict:
+    """
+    Config for a quick proxy render. Same voice take (via the base
+    cache) and same seeded layout as the final render, at `height`p /
+    `fps` with low-res plate detection.
+    """
+    return {
+        **config,
+        "PREVIEW": True,
+        "PREVIEW_HEIGHT": height,
+        "PREVIEW_FPS": fps,
+        "PLATE_IMGSZ": 320,
+        "PLATE_ADAPTIVE_IMGSZ": False,
+        "PLATE_REFINE": False,
+        "RENDER_CRF": 30,
+    }
+
+
+def _prepare_voice(prepared, tts_script, config, voice_id, voice=None):
+    """
+    TTS (ElevenLabs API / local F5, per config), decoded once.
+    """
+    if voice:
+        # a cached take, or one from process_clips' batched TTS pass
+        prepared["audio"] = voice["audio"]
+        prepared["voice"] = VoiceAudio.from_file(voice["audio"])
+        prepared["transcript"] = voice["transcript"]
+        prepared["voice_cached"] = voice.get("cached", True)
+        if not prepared["voice_cached"]:
+            prepared["temp_files"].append(voice["audio"])
+        return
+
+    tts_engine = get_tts_engine(config, voice_id)
+
+    if config.get("TTS_STREAM_ALIGN") and hasattr(tts_engine, "synthesize_aligned"):
+        # slot per generated chunk / Whisper pass, not the whole call,
+        # so the blur's per-frame slot interleaves with it
+        prepared["audio"], prepared["transcript"] = (
+            tts_engine.synthesize_aligned(tts_script, slot=gpu_slot)
+        )
+        prepared["temp_files"].append(prepared["audio"])
+        prepared["voice"] = VoiceAudio.from_file(prepared["audio"])
+    else:
+        prepared["voice"] = synthesize_voice(tts_engine, tts_script)
+        prepared["audio"] = prepared["voice"].path
+        prepared["temp_files"].append(prepared["audio"])
+
+
+def _transcribe(audios, config):
+    """
+    One batched Whisper pass over 16 kHz arrays: the node-local model
+    server when config["MODEL_SERVER"] is set, else in-process.
+    """
+    from engine.batch_transcriber import transcribe_batch
+
+    if not audios:
+        return []
+
+    if config.get("MODEL_SERVER"):
+        # shared node-local Whisper, batched across requests
+        from engine.model_server import get_client
+        return get_client().transcribe(audios)
+
+    with gpu_slot():
+        return transcribe_batch(
+            audios,
+            config=config,
+            batch_size=config.get("WHISPER_BATCH_SIZE", 8),
+        )
+
+
+def _prepare_video(prepared, video_path, output_path, config, span=None, start=0.0):
+    """
+    Ingest + plate blur of source seconds [start, start + span)
+    (span None = to the end) → the result, also set as
+    prepared["video_path"]. prepared["video_span"] is where the
+    processed part ends (None = the whole source). Loops replay those
+    already-blurred frames.
+    """
+    # --------------------------------------------------
+    # Ingest: scale + retime ONCE to the delivery size and rate
+    # (a 4K/60 phone clip becomes 1080p/30), or to the preview proxy
+    # --------------------------------------------------
+    src_w, src_h = probe_size(video_path)
+    src_duration, src_fps = probe_video(video_path)
+    height = ingest_height(src_w, src_h, config)
+    fps = ingest_fps(src_fps, config)
+
+    if span is not None and start + span >= src_duration:
+        span = None
+
+    if config.get("PREVIEW"):
+        height = min(config["PREVIEW_HEIGHT"], height)
+        fps = config["PREVIEW_FPS"]
+
+    # a later segment (start > 0) is always cut here, frame-accurately
+    tag = "_tail" if start else ""
+    path = video_path
+    if start or height < src_h or fps:
+        ingested = output_path.replace(".mp4", f"{tag}_ingest.mp4")
+        prepared["temp_files"].append(ingested)
+        path = transcode_video(
+            video_path,
+            ingested,
+            height=height if height < src_h else None,
+            fps=fps,
+            start=start,
+            duration=span,
+            crf=23 if config.get("PREVIEW") else 18
+        )
+
+    # --------------------------------------------------
+    # License plate blur (GPU – YOLO), needed span only
+    # --------------------------------------------------
+    if config.get("BLUR_PLATE", False):
+        processor = PlateBlurProcessor(
+            model_path=config["PLATE_MODEL_PATH"],
+            conf=config.get("PLATE_CONF", 0.5),
+            buffer_size=config.get("PLATE_SMOOTH", 5),
+            imgsz=config.get("PLATE_IMGSZ", 640),
+            adaptive_imgsz=config.get("PLATE_ADAPTIVE_IMGSZ", True),
+            refine=config.get("PLATE_REFINE", False),
+            backend=config.get("PLATE_BACKEND", "torch"),
+            onnx_calibration=config.get("PLATE_ONNX_CALIBRATION"),
+            onnx_threads=config.get("PLATE_ONNX_THREADS", 0),
+            io=config.get("PLATE_IO", "opencv"),
+            io_threads=config.get("PLATE_IO_THREADS", 0),
+            io_codec=config.get("PLATE_IO_CODEC", "h264"),
+            # per frame, so the voice path's Whisper / F5 get the GPU
+            # between frames instead of after the whole blur
+            slot=gpu_slot,
+        )
+
+        blurred_video = output_path.replace(".mp4", f"{tag}_blur.mp4")
+        prepared["temp_files"].append(blurred_video)
+        path = processor.process(
+            path, blurred_video,
+            max_duration=span if path == video_path else None
+        )
+
+    # untouched source: nothing was cut, it all plays
+    truncated = path != video_path and span is not None
+    prepared["video_span"] = start + span if truncated else None
+    prepared["video_path"] = path
+    return path
+
+
+def prepare_clip(
     video_path: str,
     tts_script: str,
-    highlights: list[str],
     output_path: str,
     config: dict,
     voice_id: str,
-) -> str:
+    voice: dict = None,
+    align: bool = False,
+) -> dict:
+    """
+    Stages 1–2: TTS (+ Whisper when `align`) and ingest + plate blur.
+    Returns the inputs for render_clip and the temp files it owns.
+    `voice` ({"audio", "transcript"}) skips TTS with a cached take or
+    one from the job's batched TTS pass ("cached": False).
+
+    Output length is the voice length, so frames past it (dropped by
+    the loop) are never ingested or blurred. The two paths don't
+    depend on each other: unless PREPARE_PARALLEL is False, the voice
+    path runs in a thread while the video path blurs up to
+    estimate_voice_seconds(); on an under-estimate only the missing
+    tail is ingested + blurred and appended. Latency ≈ max(blur,
+    TTS + Whisper).
+    """
+    prepared = {
+        "video_path": video_path,
+        "audio": None,      # voice file (cache / debug)
+        "voice": None,      # VoiceAudio: decoded once, shared by every stage
+        "transcript": None,
+        "temp_files": []
+    }
 
-    temp_audio = None
-    blurred_video = None
-    voice = video = final = None
+    def voice_path():
+        _prepare_voice(prepared, tts_script, config, voice_id, voice)
+        if align and prepared["transcript"] is None:
+            prepared["transcript"] = _transcribe(
+                [prepared["voice"].whisper()], config
+            )[0]
 
     try:
+        if voice or not config.get("PREPARE_PARALLEL", True):
+            # cached take: exact duration is known up front
+            voice_path()
+            _prepare_video(
+                prepared, video_path, output_path, config,
+                span=prepared["voice"].duration
+            )
+            return prepared
+
         # --------------------------------------------------
-        # 1️⃣ License plate blur (GPU – YOLO)
+        # 1️⃣ TTS → Whisper  ‖  2️⃣ ingest + blur
         # --------------------------------------------------
-        if config.get("BLUR_PLATE", False):
-            processor = PlateBlurProcessor(
-                model_path=config["PLATE_MODEL_PATH"],
-                conf=config.get("PLATE_CONF", 0.5),
-                buffer_size=config.get("PLATE_SMOOTH", 5),
+        pool = ThreadPoolExecutor(max_workers=1)
+        voice_job = pool.submit(voice_path)
+        try:
+            _prepare_video(
+                prepared, video_path, output_path, config,
+                span=estimate_voice_seconds(tts_script)
             )
+        finally:
+            pool.shutdown(wait=True)
 
-            blurred_video = output_path.replace(".mp4", "_blur.mp4")
-            video_path = processor.process(video_path, blurred_video)
+        voice_job.result()
 
-        # --------------------------------------------------
-        # 2️⃣ ElevenLabs TTS (API)
-        # --------------------------------------------------
-        tts_engine = ElevenLabsEngine(voice_id)
-        temp_audio = tts_engine.synthesize(tts_script)
+        end = prepared["video_span"]
+        duration = prepared["voice"].duration
+        if end is not None and duration > end:
+            print(
+                f"⚠️ Voice ({duration:.1f}s) longer than estimate "
+                f"({end:.1f}s), blurring the remaining {duration - end:.1f}s"
+            )
+            head = prepared["video_path"]
+            tail = _prepare_video(
+                prepared, video_path, output_path, config,
+                span=duration - end, start=end
+            )
+            joined = output_path.replace(".mp4", "_joined.mp4")
+            prepared["temp_files"].append(joined)
+            prepared["video_path"] = concat_video([head, tail], joined)
+
+        return prepared
+
+    except Exception:
+        cleanup_clip(prepared)
+        raise
+
+
+def render_clip(
+    prepared: dict,
+    highlights: list[str],
+    output_path: str,
+    config: dict,
+    transcript: dict = None,
+) -> str:
+    """
+    Stages 3–6: highlight timing, layout, export.
+    `transcript` comes from a job-level batched Whisper pass; without
+    it the clip's audio is transcribed on its own.
+    """
+    video = final = video_only = voice_track = None
+    temp_audio = prepared["audio"]
+    voice = prepared.get("voice")
+    output_mode = config.get("OUTPUT_MODE", "faststart")
+    transcript = transcript or prepared.get("transcript")
 
+    try:
         # --------------------------------------------------
-        # 3️⃣ Faster-Whisper (GPU)
+        # 3️⃣ Faster-Whisper (GPU / CPU int8)
         # --------------------------------------------------
-        highlight_engine = HighlightEngine(temp_audio)
+        highlight_engine = HighlightEngine(
+            temp_audio, config=config, transcript=transcript
+        )
         timed_highlights = highlight_engine.run(highlights)
 
         if not timed_highlights:
             raise RuntimeError("No highlights matched audio")
 
+        # same highlights → same zones / casing, so a preview and its
+        # final render lay out identically
+        rng = random.Random("\n".join(highlights))
+
+        if config.get("RENDER_BACKEND", "moviepy") == "ass":
+            return _render_ass(prepared, timed_highlights, output_path, config, rng)
+
         # --------------------------------------------------
-        # 4️⃣ Load video + audio (CPU – unavoidable)
+        # 4️⃣ Load video (the voice is already decoded; its length
+        # comes from the sample count)
         # --------------------------------------------------
-        voice = AudioFileClip(temp_audio)
-        video = VideoFileClip(video_path).loop(duration=voice.duration)
+        if prepared.get("base"):
+            # cached base: already blurred, looped and muxed with voice
+            video = VideoFileClip(prepared["video_path"], audio=False)
+        else:
+            video = (
+                VideoFileClip(prepared["video_path"], audio=False)
+                .loop(duration=voice.duration)
+            )
 
         # --------------------------------------------------
         # 5️⃣ Styling + layout (CPU)
         # --------------------------------------------------
-        style_engine = StyleEngine(fonts_dir="fonts")
-        style_config = style_engine.generate_style(video)
-        render_config = {**config, **style_config}
+        render_config = _render_style(video, prepared, config)
 
-        renderer = TextRenderer(render_config)
+        renderer = TextRenderer(render_config, rng=rng)
         builder = VideoBuilder(video, render_config)
-        zones = ZoneAllocator()
+        zones = ZoneAllocator(rng=rng)
 
         for h in timed_highlights:
             zone = zones.choose(
@@ -97,38 +394,353 @@ def process_single_clip(
 
         # --------------------------------------------------
         # 6️⃣ EXPORT (GPU ENCODE – NVENC)
+        # the voice is encoded to AAC exactly once (copied when the
+        # base has it)
         # --------------------------------------------------
-        final = builder.render(return_clip=True).set_audio(voice)
+        final = builder.render(return_clip=True).without_audio()
+        encode_params = [
+            "-preset", "ultrafast",
+            "-crf", str(config.get("RENDER_CRF", 23)),
+            "-pix_fmt", "yuv420p"
+        ]
+
+        if output_mode == "fragmented":
+            # encoder writes the deliverable directly as fragments, so
+            # it plays while rendering and there is no remux pass
+            if prepared.get("base"):
+                voice_track = temp_audio
+            else:
+                voice_track = encode_audio(
+                    voice.pcm, output_path.replace(".mp4", "_voice.m4a")
+                )
+
+            final.write_videofile(
+                output_path,
+                codec="libx264",
+                audio=voice_track,
+                fps=video.fps,
+                threads=4,
+                logger=None,
+                ffmpeg_params=encode_params + [
+                    "-map", "0:v:0",
+                    "-map", "1:a:0",
+                    *keyframe_flags(output_mode),
+                    *movflags(output_mode)
+                ]
+            )
+            return output_path
+
+        # video only here; the voice is muxed afterwards
+        video_only = output_path.replace(".mp4", "_video.mp4")
 
         final.write_videofile(
-            output_path,
+            video_only,
             codec="libx264",
-            audio_codec="aac",
+            audio=False,
             fps=video.fps,
             threads=4,
             logger=None,
-            ffmpeg_params=[
-                "-preset", "ultrafast",
-                "-crf", "23",
-                "-pix_fmt", "yuv420p",
-                "-movflags", "+faststart"
-            ]
+            ffmpeg_params=encode_params
         )
 
+        mux(
+            video_only,
+            temp_audio if prepared.get("base") else voice.pcm,
+            output_path,
+            audio_codec="copy" if prepared.get("base") else "aac"
+        )
 
         return output_path
 
     finally:
-        for obj in (voice, video, final):
+        for obj in (video, final):
             try:
                 if obj:
                     obj.close()
             except Exception:
                 pass
 
-        for f in (temp_audio, blurred_video):
-            try:
-                if f and os.path.exists(f):
-                    os.remove(f)
-            except Exception:
-                pass
+        if video_only and os.path.exists(video_only):
+            os.remove(video_only)
+
+        if voice_track and voice_track != temp_audio and os.path.exists(voice_track):
+            os.remove(voice_track)
+
+
+def _render_style(video, prepared, config) -> dict:
+    """
+    StyleEngine preset merged into config. For a preview proxy the
+    pixel sizes are scaled by proxy/final height (RENDER_SCALE) so
+    the overlay is the final layout, shrunk.
+    """
+    style = {**config, **StyleEngine(fonts_dir="fonts").generate_style(video)}
+
+    if config.get("PREVIEW") and prepared.get("source"):
+        final_h = ingest_height(*probe_size(prepared["source"]), config)
+        scale = video.h / final_h
+        style["RENDER_SCALE"] = scale
+        for k in ("PADDING", "LINE_GAP", "GLOW_BLUR"):
+            style[k] = max(1, int(round(style[k] * scale)))
+
+    return style
+
+
+def _render_ass(prepared, timed_highlights, output_path, config, rng=None) -> str:
+    """
+    RENDER_BACKEND="ass": same style + zone layout, written as an ASS
+    script and burned in by ffmpeg/libass in the one final encode.
+    No per-frame Python.
+    """
+    video = None
+    ass_path = output_path.replace(".mp4", ".ass")
+
+    try:
+        # style needs a few frames; the clip is closed before encoding
+        video = VideoFileClip(prepared["video_path"], audio=False)
+        style = _render_style(video, prepared, config)
+        renderer = AssRenderer(style, video.w, video.h, rng=rng)
+        video.close()
+        video = None
+
+        zones = ZoneAllocator(rng=rng)
+        for h in timed_highlights:
+            zone = zones.choose(
+                start=h["start"],
+                end=h["end"],
+                prefer_upper=any(c.isdigit() for c in h["text"])
+            )
+            renderer.add_highlight(h["text"], h["start"], h["end"], zone)
+
+        renderer.write(ass_path)
+
+        base = prepared.get("base")
+        return burn_in(
+            prepared["video_path"],
+            prepared["audio"] if base else prepared["voice"].pcm,
+            ass_path,
+            output_path,
+            loop=not base,
+            audio_codec="copy" if base else "aac",
+            fonts_dir="fonts",
+            crf=config.get("RENDER_CRF", 23),
+            output_mode=config.get("OUTPUT_MODE", "faststart")
+        )
+
+    finally:
+        if video:
+            video.close()
+        if os.path.exists(ass_path):
+            os.remove(ass_path)
+
+
+def cleanup_clip(prepared: dict):
+    for f in prepared["temp_files"]:
+        try:
+            if f and os.path.exists(f):
+                os.remove(f)
+        except Exception:
+            pass
+
+
+def process_single_clip(
+    video_path: str,
+    tts_script: str,
+    highlights: list[str],
+    output_path: str,
+    config: dict,
+    voice_id: str,
+) -> str:
+
+    return process_clips(
+        [{
+            "video_path": video_path,
+            "tts_script": tts_script,
+            "highlights": highlights,
+            "output_path": output_path,
+        }],
+        config=config,
+        voice_id=voice_id
+    )[0]
+
+
+def _from_base(base: dict) -> dict:
+    return {
+        "video_path": base["video"],
+        "audio": base["video"],
+        "voice": None,
+        "transcript": base["transcript"],
+        "base": True,
+        "temp_files": []
+    }
+
+
+def _mux_base(prepared: dict, output_path: str) -> str:
+    """
+    Cached base: the prepared video looped under the voice. The video
+    is stream-copied (no second encode on a cache miss) unless MP4
+    can't carry its codec, e.g. an un-ingested ProRes source.
+    """
+    stem = os.path.splitext(output_path)[0]
+    base_path = f"{stem}_base.mp4"
+    prepared["temp_files"].append(base_path)
+
+    video = prepared["video_path"]
+    try:
+        return mux(video, prepared["voice"].pcm, base_path, audio_codec="aac", loop=True)
+    except subprocess.CalledProcessError:
+        h264 = f"{stem}_base_h264.mp4"
+        prepared["temp_files"].append(h264)
+        video = transcode_video(video, h264, crf=16)
+
+    return mux(video, prepared["voice"].pcm, base_path, audio_codec="aac", loop=True)
+
+
+def _synthesize_batch(scripts, config, voice_id) -> list:
+    """
+    Every script through the backend's batched synthesize_many() (F5:
+    all sentence chunks of all clips share model passes) →
+    [{"audio", "transcript": None, "cached": False}], or None when the
+    backend has no batched path or streaming alignment is on.
+    """
+    if len(scripts) < 2 or config.get("TTS_STREAM_ALIGN"):
+        return None
+
+    tts_engine = get_tts_engine(config, voice_id)
+    if not hasattr(tts_engine, "synthesize_many"):
+        return None
+
+    return [
+        {"audio": path, "transcript": None, "cached": False}
+        for path in tts_engine.synthesize_many(scripts)
+    ]
+
+
+def process_clips(
+    clips: list[dict],
+    config: dict,
+    voice_id: str,
+    progress=None,
+) -> list[str]:
+    """
+    Job-level pipeline. Each clip dict has:
+      video_path, tts_script, highlights, output_path
+
+    Blur and TTS run side by side per clip, then every clip's TTS
+    audio is transcribed in ONE batched Whisper pass, then clips
+    render. A single clip is transcribed on its voice path instead,
+    overlapping its blur.
+
+    With config["BASE_CACHE"], blur + TTS + Whisper results are kept
+    as a cached base clip; re-running with only highlight / style
+    changes skips straight to overlay compositing + encode. The voice
+    take is cached on its own too, so a preview_config() render and
+    the final render share it.
+
+    `progress(stage, value, message)` receives per-stage events.
+    """
+    cache = None
+    if config.get("BASE_CACHE"):
+        cache = BaseClipCache(
+            config.get("BASE_CACHE_DIR", "cache/base"),
+            max_gb=config.get("BASE_CACHE_MAX_GB", 20),
+            max_days=config.get("BASE_CACHE_MAX_DAYS", 30)
+        )
+
+    prepared = []
+    synthesized = []
+    n = len(clips)
+
+    def report(stage, value, message=None):
+        if progress:
+            progress(stage, round(value, 3), message)
+
+    try:
+        keys, hits, voices = [], [], []
+        for c in clips:
+            key = hit = voice = None
+            if cache:
+                key = cache.key(c["video_path"], c["tts_script"], voice_id, config)
+                hit = cache.get(key)
+                if not hit:
+                    voice = cache.get_voice(
+                        cache.voice_key(c["tts_script"], voice_id, config)
+                    )
+            keys.append(key)
+            hits.append(hit)
+            voices.append(voice)
+
+        # clips still needing TTS share one batched pass when the backend
+        # has one (F5); otherwise each clip synthesizes beside its blur
+        todo = [i for i in range(n) if not hits[i] and not voices[i]]
+        if len(todo) > 1:
+            report("tts", 0.0, f"{len(todo)} clip(s)")
+            batch = _synthesize_batch(
+                [clips[i]["tts_script"] for i in todo], config, voice_id
+            )
+            if batch:
+                synthesized = [v["audio"] for v in batch]
+                for i, v in zip(todo, batch):
+                    voices[i] = v
+
+        for i, c in enumerate(clips):
+            report("prepare", 0.5 * i / n, f"clip {i + 1}/{n}")
+
+            key, hit, voice = keys[i], hits[i], voices[i]
+
+            if hit:
+                p = _from_base(hit)
+            else:
+                p = prepare_clip(
+                    c["video_path"],
+                    c["tts_script"],
+                    c["output_path"],
+                    config,
+                    voice_id,
+                    voice=voice,
+                    # single clip: Whisper rides the voice path, beside
+                    # the blur; several clips share one batched pass
+                    align=(n == 1)
+                )
+
+            p["cache_key"] = key
+            p["source"] = c["video_path"]
+            prepared.append(p)
+
+        # clips already aligned (streaming / cache / single clip) skip the batch;
+        # Whisper gets the 16 kHz view of the decoded voice
+        todo = [p for p in prepared if p["transcript"] is None]
+        report("transcribe", 0.5, f"{len(todo)} clip(s)")
+        batched = _transcribe([p["voice"].whisper() for p in todo], config)
+        for p, t in zip(todo, batched):
+            p["transcript"] = t
+
+        if cache:
+            for i, (p, c) in enumerate(zip(prepared, clips)):
+                if p.get("base"):
+                    continue
+                if not p.get("voice_cached"):
+                    cache.put_voice(
+                        cache.voice_key(c["tts_script"], voice_id, config),
+                        p["audio"],
+                        p["transcript"]
+                    )
+                base = cache.put(
+                    p["cache_key"], _mux_base(p, c["output_path"]), p["transcript"]
+                )
+                cleanup_clip(p)
+                prepared[i] = {**_from_base(base), "source": c["video_path"]}
+
+        outputs = []
+        for i, (p, c) in enumerate(zip(prepared, clips)):
+            report("render", 0.6 + 0.4 * i / n, f"clip {i + 1}/{n}")
+            outputs.append(
+                render_clip(p, c["highlights"], c["output_path"], config)
+            )
+
+        return outputs
+
+    finally:
+        for p in prepared:
+            cleanup_clip(p)
+        # batched takes of clips that never got prepared
+        cleanup_clip({"temp_files": synthesized})
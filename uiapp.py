@@ -10,7 +10,7 @@ from engine.voice_registry import (
     add_voice
 )
 
-from pipeline.process_clip import process_single_clip
+from pipeline.process_clip import process_clips, preview_config
 from pipeline.combine_clips import combine_clips
 
 # --------------------------------------------------
@@ -21,14 +21,18 @@ load_dotenv()
 UPLOAD_DIR = "uploads"
 CLIPS_DIR = "clips_output"
 FINAL_VIDEO = "final.mp4"
+PREVIEW_DIR = "clips_preview"
+PREVIEW_VIDEO = "preview.mp4"
 LOGO_PATH = "bluvo-logo.png"
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CLIPS_DIR, exist_ok=True)
+os.makedirs(PREVIEW_DIR, exist_ok=True)
 
 CONFIG = {
     "BLUR_PLATE": True,
-    "PLATE_MODEL_PATH": "models/lp_key_point.pt"
+    "PLATE_MODEL_PATH": "models/lp_key_point.pt",
+    "BASE_CACHE": True,
 }
 
 # --------------------------------------------------
@@ -58,6 +62,7 @@ def generate_all(
     driver_v, driver_t, driver_h,
     passenger_v, passenger_t, passenger_h,
     interior_v, interior_t, interior_h,
+    preview=False,
 ):
     voice_id = get_voice_id(voice_name)
     if not voice_id:
@@ -73,24 +78,41 @@ def generate_all(
         front_h, rear_h, driver_h, passenger_h, interior_h
     ]
 
+    jobs = []
+
     for i in range(5):
         if not clips[i] or not texts[i] or not highlights[i]:
             raise gr.Error(f"Section {i+1} incomplete")
 
         raw = f"{UPLOAD_DIR}/{i+1}.mp4"
-        out = f"{CLIPS_DIR}/{i+1}.mp4"
+        out = f"{PREVIEW_DIR if preview else CLIPS_DIR}/{i+1}.mp4"
 
         with open(raw, "wb") as f:
             f.write(clips[i])
 
-        process_single_clip(
-            video_path=raw,
-            tts_script=texts[i],
-            highlights=highlights[i].splitlines(),
-            output_path=out,
-            config=CONFIG,
-            voice_id=voice_id
+        jobs.append({
+            "video_path": raw,
+            "tts_script": texts[i],
+            "highlights": highlights[i].splitlines(),
+            "output_path": out,
+        })
+
+    if preview:
+        # 540p / 15 fps proxy, same voice take + layout as Finalize
+        process_clips(jobs, config=preview_config(CONFIG), voice_id=voice_id)
+
+        combine_clips(
+            clips_dir=PREVIEW_DIR,
+            output_path=PREVIEW_VIDEO,
+            logo_path=LOGO_PATH,
+            target_w=960,
+            target_h=540,
+            margin=20,
+            compress=False
         )
+        return PREVIEW_VIDEO
+
+    process_clips(jobs, config=CONFIG, voice_id=voice_id)
 
     combine_clips(
         clips_dir=CLIPS_DIR,
@@ -102,6 +124,10 @@ def generate_all(
 
     return FINAL_VIDEO
 
+
+def preview_all(*args):
+    return generate_all(*args, preview=True)
+
 # --------------------------------------------------
 # UI
 # --------------------------------------------------
@@ -143,22 +169,23 @@ with gr.Blocks(title="AI Car Video Generator") as demo:
     interior_v, interior_t, interior_h = section("Interior")
 
     # ---------------- Generate ----------------
-    generate_btn = gr.Button("🔥 Generate Final Video", variant="primary")
-    output_video = gr.Video(label="Final Output")
-
-    generate_btn.click(
-        generate_all,
-        inputs=[
-            voice_dropdown,
-
-            front_v, front_t, front_h,
-            rear_v, rear_t, rear_h,
-            driver_v, driver_t, driver_h,
-            passenger_v, passenger_t, passenger_h,
-            interior_v, interior_t, interior_h,
-        ],
-        outputs=output_video
-    )
+    with gr.Row():
+        preview_btn = gr.Button("👀 Preview (540p)")
+        generate_btn = gr.Button("🔥 Finalize Video", variant="primary")
+    output_video = gr.Video(label="Output")
+
+    all_inputs = [
+        voice_dropdown,
+
+        front_v, front_t, front_h,
+        rear_v, rear_t, rear_h,
+        driver_v, driver_t, driver_h,
+        passenger_v, passenger_t, passenger_h,
+        interior_v, interior_t, interior_h,
+    ]
+
+    preview_btn.click(preview_all, inputs=all_inputs, outputs=output_video)
+    generate_btn.click(generate_all, inputs=all_inputs, outputs=output_video)
 
 demo.launch(
     server_name="0.0.0.0",